@@ -1,10 +1,27 @@
-from fastapi import FastAPI, HTTPException
+from fastapi import FastAPI, HTTPException, Request
 from fastapi.middleware.cors import CORSMiddleware
-from pydantic import BaseModel
-import requests
-from bs4 import BeautifulSoup
+from pydantic import BaseModel, Field
+from contextlib import aclosing
+from typing import Literal
+import os
+import re
+import sys
+import time
+import asyncio
+import logging
+import httpx
+
+# Make api/common importable whether the service is started from its own folder or from api/
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from common.html_parsing import default_parser, first, has_class, lxml_document, only, parse_html, text_of
+from common.streaming import stream_response
+from common.structured_logging import CorrelationIdMiddleware, configure_logging
+
+configure_logging("auction_api")
+logger = logging.getLogger(__name__)
 
 app = FastAPI()
+app.add_middleware(CorrelationIdMiddleware)
 
 # Add CORS middleware to allow all origins
 app.add_middleware(
@@ -16,32 +33,130 @@ app.add_middleware(
 )
 
 
+# How long a CSRF token and its cookies are reused before being fetched again
+CSRF_TTL = float(os.getenv("AUCTION_CSRF_TTL", "600"))
+
+# Shared HTTP client settings; HTTP/2 needs the h2 package (pip install httpx[http2])
+CONNECT_TIMEOUT = float(os.getenv("AUCTION_CONNECT_TIMEOUT", "5"))
+READ_TIMEOUT = float(os.getenv("AUCTION_READ_TIMEOUT", "20"))
+MAX_CONNECTIONS = int(os.getenv("AUCTION_MAX_CONNECTIONS", "20"))
+HTTP2 = os.getenv("AUCTION_HTTP2", "0") == "1"
+
+# Result pages fetched at once when a request asks for all pages
+PAGE_CONCURRENCY = int(os.getenv("AUCTION_PAGE_CONCURRENCY", "4"))
+
+USER_AGENT = 'Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/129.0.0.0 Safari/537.36'
+
+CSRF_REJECTION_PATTERN = re.compile(r'invalid\s+(csrf|token)|csrf\s+token\s+(is\s+)?(invalid|expired|missing)', re.IGNORECASE)
+
+
 class AuctionRequest(BaseModel):
     keyword: str
     page: int = 1  # Optional page number, default to 1
+    all_pages: bool = False  # Fetch every result page instead of just `page`
+    stream: bool = False  # With all_pages, stream page by page (NDJSON, or SSE with ?format=sse)
+    max_pages: int = Field(50, ge=1)
+
+
+def create_http_client():
+    http2 = HTTP2
+    if http2:
+        try:
+            import h2  # noqa: F401
+        except ImportError:
+            logger.warning("AUCTION_HTTP2 is set but the h2 package is missing; using HTTP/1.1")
+            http2 = False
+    return httpx.AsyncClient(
+        http2=http2,
+        timeout=httpx.Timeout(READ_TIMEOUT, connect=CONNECT_TIMEOUT),
+        limits=httpx.Limits(max_connections=MAX_CONNECTIONS, max_keepalive_connections=MAX_CONNECTIONS),
+        headers={'User-Agent': USER_AGENT},
+        follow_redirects=True,
+    )
 
 
-def get_csrf_token_and_cookies():
+async def get_csrf_token_and_cookies(client):
     url = "https://forwardauction.gem.gov.in/"
-    session = requests.Session()  # Maintain the session to handle cookies
-    response = session.get(url)
+    response = await client.get(url)  # The client's cookie jar keeps the session cookies
 
     if response.status_code == 200:
-        soup = BeautifulSoup(response.text, 'html.parser')
+        soup = parse_html(response.text, parse_only=only('input', attrs={'name': '_csrf'}), parser=default_parser())
         csrf_token = soup.find('input', {'name': '_csrf'})['value']
-        return csrf_token, session.cookies
+        return csrf_token, client.cookies
     else:
         return None, None
 
 
-def scrape_auctions(keyword, page=1):
-    csrf_token, cookies = get_csrf_token_and_cookies()
-    if not csrf_token or not cookies:
-        raise HTTPException(status_code=500, detail="Could not retrieve CSRF token or cookies.")
+class GemSession:
+    """Shared keep-alive client and CSRF token for forwardauction.gem.gov.in.
+
+    The token is fetched lazily and reused until it expires or the site rejects it.
+    Refreshes happen under a lock, so concurrent requests wait for one refresh
+    instead of each fetching the home page.
+    """
+
+    def __init__(self, ttl):
+        self.ttl = ttl
+        self._lock = asyncio.Lock()
+        self.client = None
+        self.csrf_token = None
+        self.fetched_at = 0.0
+        self.generation = 0
+
+    async def start(self):
+        self.client = create_http_client()
+
+    async def close(self):
+        if self.client is not None:
+            await self.client.aclose()
+            self.client = None
+
+    async def get(self):
+        async with self._lock:
+            if self.client is None:
+                await self.start()
+            if self.csrf_token is None or time.time() - self.fetched_at > self.ttl:
+                await self._refresh()
+            return self.client, self.csrf_token, self.generation
+
+    async def invalidate(self, generation):
+        async with self._lock:
+            # Only drop the token the caller used; another request may already have replaced it
+            if generation == self.generation:
+                self.csrf_token = None
+
+    async def _refresh(self):
+        self.client.cookies.clear()
+        csrf_token, cookies = await get_csrf_token_and_cookies(self.client)
+        if not csrf_token or not cookies:
+            raise HTTPException(status_code=500, detail="Could not retrieve CSRF token or cookies.")
+        self.csrf_token = csrf_token
+        self.fetched_at = time.time()
+        self.generation += 1
+
+
+gem_session = GemSession(CSRF_TTL)
+
 
+@app.on_event("startup")
+async def start_gem_session():
+    await gem_session.start()
+
+
+@app.on_event("shutdown")
+async def close_gem_session():
+    await gem_session.close()
+
+
+def is_csrf_rejection(response):
+    return response.status_code in (401, 403, 419) or bool(CSRF_REJECTION_PATTERN.search(response.text))
+
+
+async def fetch_auction_page(keyword, page=1):
+    """POST one search page and return the raw listing HTML."""
     url = "https://forwardauction.gem.gov.in/eprocure/ajax/search-auction"
     headers = {
-        'User-Agent': 'Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/129.0.0.0 Safari/537.36',
+        'User-Agent': USER_AGENT,
         'X-Requested-With': 'XMLHttpRequest',
         'Content-Type': 'application/x-www-form-urlencoded; charset=UTF-8',
         'Referer': 'https://forwardauction.gem.gov.in/',
@@ -67,56 +182,248 @@ def scrape_auctions(keyword, page=1):
         'perPage': '40',
         'currentPage': str(page),
         'catID': '',
-        '_csrf': csrf_token
     }
 
-    response = requests.post(url, data=payload, headers=headers, cookies=cookies)
+    for attempt in range(2):
+        client, csrf_token, generation = await gem_session.get()
+        response = await client.post(url, data={**payload, '_csrf': csrf_token}, headers=headers)
+        if attempt == 0 and is_csrf_rejection(response):
+            await gem_session.invalidate(generation)
+            continue
+        break
 
-    if response.status_code == 200:
-        soup = BeautifulSoup(response.content, 'html.parser')
-        auctions = soup.find_all('div', class_='listing-content')
-        auction_data = []
-
-        for auction in auctions:
-            auction_id = auction.find('div', class_='index').text.strip().replace("Auction ID : ", "")
-            brief = auction.find('div', class_='brief').text.strip()
-            link = auction.find('a', class_='brief')['href']
-
-            location_icon = auction.find('i', class_='fa-map-marker')
-            location = 'N/A'
-            if location_icon:
-                location_span = location_icon.find_next('span')
-                if location_span:
-                    location = location_span.text.strip()
-
-            start_date = auction.find('span', class_='start-date')
-            start_date = start_date.text.strip().replace("Start Date :", "").strip() if start_date else 'N/A'
-
-            end_date = auction.find('span', class_='end-date')
-            end_date = end_date.text.strip().replace("End Date :", "").strip() if end_date else 'N/A'
-
-            organizer = auction.find('div', class_='department')
-            organizer = organizer.text.strip() if organizer else 'N/A'
-
-            auction_data.append({
-                'Auction ID': auction_id,
-                'Brief': brief,
-                'Link': "https://forwardauction.gem.gov.in" + link,
-                'Location': location,
-                'Start Date': start_date,
-                'End Date': end_date,
-                'Organizer': organizer
-            })
-
-        return auction_data
-    else:
+    if response.status_code != 200:
         raise HTTPException(status_code=500, detail=f"Failed to retrieve auctions: {response.status_code}")
+    return response.content
+
+
+# Only the result cards are needed, so the rest of the response is never built into the tree
+LISTING_STRAINER = only('div', class_='listing-content')
+
+
+def parse_auctions(content, parser=None, parse_only=LISTING_STRAINER):
+    parser = parser or default_parser()
+    if parser == "lxml":
+        return parse_auctions_lxml(content)
+
+    soup = parse_html(content, parse_only=parse_only, parser=parser)
+    auctions = soup.find_all('div', class_='listing-content')
+    auction_data = []
+
+    for auction in auctions:
+        auction_id = auction.find('div', class_='index').text.strip().replace("Auction ID : ", "")
+        brief = auction.find('div', class_='brief').text.strip()
+        link = auction.find('a', class_='brief')['href']
+
+        location_icon = auction.find('i', class_='fa-map-marker')
+        location = 'N/A'
+        if location_icon:
+            location_span = location_icon.find_next('span')
+            if location_span:
+                location = location_span.text.strip()
+
+        start_date = auction.find('span', class_='start-date')
+        start_date = start_date.text.strip().replace("Start Date :", "").strip() if start_date else 'N/A'
+
+        end_date = auction.find('span', class_='end-date')
+        end_date = end_date.text.strip().replace("End Date :", "").strip() if end_date else 'N/A'
+
+        organizer = auction.find('div', class_='department')
+        organizer = organizer.text.strip() if organizer else 'N/A'
+
+        auction_data.append({
+            'Auction ID': auction_id,
+            'Brief': brief,
+            'Link': "https://forwardauction.gem.gov.in" + link,
+            'Location': location,
+            'Start Date': start_date,
+            'End Date': end_date,
+            'Organizer': organizer
+        })
+
+    return auction_data
+
+
+def parse_auctions_lxml(content):
+    """Same fields as parse_auctions, read from an lxml tree with XPath."""
+    document = lxml_document(content)
+    auction_data = []
+
+    for auction in document.xpath(f"//div[{has_class('listing-content')}]"):
+        auction_id = text_of(first(auction, f".//div[{has_class('index')}]")).strip().replace("Auction ID : ", "")
+        brief = text_of(first(auction, f".//div[{has_class('brief')}]")).strip()
+        link = first(auction, f".//a[{has_class('brief')}]").attrib['href']
+
+        location_icon = first(auction, f".//i[{has_class('fa-map-marker')}]")
+        location = 'N/A'
+        if location_icon is not None:
+            # find_next('span') looks at the icon's own descendants first, then everything after it
+            location_span = first(location_icon, "(descendant::span | following::span)[1]")
+            if location_span is not None:
+                location = text_of(location_span).strip()
+
+        start_date = first(auction, f".//span[{has_class('start-date')}]")
+        start_date = text_of(start_date).strip().replace("Start Date :", "").strip() if start_date is not None else 'N/A'
+
+        end_date = first(auction, f".//span[{has_class('end-date')}]")
+        end_date = text_of(end_date).strip().replace("End Date :", "").strip() if end_date is not None else 'N/A'
+
+        organizer = first(auction, f".//div[{has_class('department')}]")
+        organizer = text_of(organizer).strip() if organizer is not None else 'N/A'
+
+        auction_data.append({
+            'Auction ID': auction_id,
+            'Brief': brief,
+            'Link': "https://forwardauction.gem.gov.in" + link,
+            'Location': location,
+            'Start Date': start_date,
+            'End Date': end_date,
+            'Organizer': organizer
+        })
+
+    return auction_data
+
+
+# The page count normally sits in a hidden input, so only inputs are built into the tree at first
+TOTAL_PAGES_STRAINER = only('input')
+
+
+def parse_total_pages(content, parser=None):
+    """Read the number of result pages from a listing response; 1 when it has no pager."""
+    parser = parser or default_parser()
+    if parser == "lxml":
+        return parse_total_pages_lxml(content)
+
+    soup = parse_html(content, parse_only=TOTAL_PAGES_STRAINER, parser=parser)
+    total_input = soup.find('input', attrs={'name': 'totalPages'}) or soup.find('input', id='totalPages')
+    if total_input and str(total_input.get('value', '')).strip().isdigit():
+        return max(1, int(total_input['value']))
+
+    # No hidden count: the pager links can sit anywhere, so this rare case reads the full tree
+    soup = parse_html(content, parser=parser)
+    pages = [int(tag['data-page']) for tag in soup.find_all(attrs={'data-page': re.compile(r'^\d+$')})]
+    pagination = soup.find(class_='pagination')
+    if pagination:
+        pages += [int(link.text.strip()) for link in pagination.find_all('a') if link.text.strip().isdigit()]
+    return max(pages, default=1)
+
+
+def parse_total_pages_lxml(content):
+    """Same page count as parse_total_pages, read from an lxml tree with XPath."""
+    document = lxml_document(content)
+    total_input = first(document, "//input[@name='totalPages']")
+    if total_input is None:
+        total_input = first(document, "//input[@id='totalPages']")
+    if total_input is not None and str(total_input.get('value', '')).strip().isdigit():
+        return max(1, int(total_input.get('value')))
+
+    pages = [int(value) for value in document.xpath("//@data-page") if re.match(r'^\d+$', value)]
+    pagination = first(document, f"//*[{has_class('pagination')}]")
+    if pagination is not None:
+        pages += [int(text) for text in (text_of(link).strip() for link in pagination.xpath(".//a")) if text.isdigit()]
+    return max(pages, default=1)
+
+
+async def scrape_auctions(keyword, page=1):
+    content = await fetch_auction_page(keyword, page)
+    # Parsing is CPU-bound; in a worker thread it doesn't hold up the event loop's other requests
+    return await asyncio.to_thread(parse_auctions, content)
+
+
+async def iter_all_auction_pages(keyword, max_pages, concurrency):
+    """Fetch page 1, read the page count, then fetch the remaining pages concurrently.
+
+    Yields (page, auctions, error) as each page completes. Only a failure on page 1 raises.
+    """
+    content = await fetch_auction_page(keyword, 1)
+    total_pages = min(await asyncio.to_thread(parse_total_pages, content), max_pages)
+    yield 1, await asyncio.to_thread(parse_auctions, content), None
+
+    semaphore = asyncio.Semaphore(concurrency)
+
+    async def fetch(page):
+        async with semaphore:
+            try:
+                return page, await scrape_auctions(keyword, page), None
+            except Exception as e:
+                logger.error("Failed to fetch auction page %s: %s", page, e)
+                return page, [], str(e) or type(e).__name__
+
+    tasks = [asyncio.create_task(fetch(page)) for page in range(2, total_pages + 1)]
+    try:
+        for next_done in asyncio.as_completed(tasks):
+            yield await next_done
+    finally:
+        # Reached early when a streaming client disconnects
+        for task in tasks:
+            task.cancel()
+
+
+def merge_new_auctions(auctions, seen):
+    fresh = []
+    for auction in auctions:
+        if auction['Auction ID'] not in seen:
+            seen.add(auction['Auction ID'])
+            fresh.append(auction)
+    return fresh
+
+
+async def stream_all_auctions(first_page, pages):
+    """(event, data) for every page; `first_page` was already awaited so page-1 errors surface as a 500."""
+    seen = set()
+    failed_pages = []
+    count = 0
+
+    async def all_pages():
+        yield first_page
+        async for item in pages:
+            yield item
+
+    # Closing `pages` cancels the fetches still running when the client goes away
+    async with aclosing(pages):
+        async for page, auctions, error in all_pages():
+            count += 1
+            if error:
+                failed_pages.append(page)
+                yield "error", {"page": page, "detail": error}
+                continue
+            yield "page", {"page": page, "data": merge_new_auctions(auctions, seen)}
+    yield "done", {"pages": count, "total": len(seen), "failed_pages": sorted(failed_pages)}
+
+
+async def scrape_all_auctions(keyword, max_pages, concurrency):
+    by_page = {}
+    failed_pages = []
+    async for page, auctions, error in iter_all_auction_pages(keyword, max_pages, concurrency):
+        if error:
+            failed_pages.append(page)
+        by_page[page] = auctions
+
+    # Merge in page order so the combined list matches what paging through by hand would give
+    seen = set()
+    merged = []
+    for page in sorted(by_page):
+        merged += merge_new_auctions(by_page[page], seen)
+    return merged, len(by_page), sorted(failed_pages)
 
 
 @app.post("/scrape-auctions/")
-def scrape_auction_endpoint(request: AuctionRequest):
+async def scrape_auction_endpoint(request: AuctionRequest, raw_request: Request,
+                                  format: Literal["ndjson", "sse"] = "ndjson"):
     try:
-        result = scrape_auctions(request.keyword, request.page)
+        if request.all_pages and request.stream:
+            pages = iter_all_auction_pages(request.keyword, request.max_pages, PAGE_CONCURRENCY)
+            first_page = await pages.__anext__()
+            return stream_response(stream_all_auctions(first_page, pages), format, raw_request,
+                                   f"auction pages for: {request.keyword}")
+        if request.all_pages:
+            result, pages, failed_pages = await scrape_all_auctions(request.keyword, request.max_pages, PAGE_CONCURRENCY)
+            response = {"status": "success", "data": result, "pages": pages, "failed_pages": failed_pages}
+            if not result:
+                response["message"] = "No auctions found."
+            return response
+
+        result = await scrape_auctions(request.keyword, request.page)
         if result:
             return {"status": "success", "data": result}
         else:
@@ -0,0 +1,21 @@
+import importlib.util
+import os
+import sys
+
+API_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+FIXTURES_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), "fixtures")
+
+# Benchmarks import the shared helpers as common.<module>, like the services do
+if API_DIR not in sys.path:
+    sys.path.insert(0, API_DIR)
+
+
+def load_service(folder):
+    """Import api/<folder>/app.py under a unique module name (every service module is called app)."""
+    service_dir = os.path.join(API_DIR, folder)
+    if service_dir not in sys.path:
+        sys.path.insert(0, service_dir)
+    spec = importlib.util.spec_from_file_location(f"{folder}_app", os.path.join(service_dir, "app.py"))
+    module = importlib.util.module_from_spec(spec)
+    spec.loader.exec_module(module)
+    return module
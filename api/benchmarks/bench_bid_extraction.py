@@ -0,0 +1,59 @@
+"""Per-page latency of bid_api card extraction: one execute_script call vs per-element lookups.
+
+Run from api/:  python benchmarks/bench_bid_extraction.py [--runs 20] [fixture.html ...]
+Needs Chrome and chromedriver, like bid_api itself.
+"""
+import argparse
+import os
+import statistics
+import time
+
+from _util import FIXTURES_DIR, load_service
+
+from selenium.webdriver.common.by import By
+
+
+def time_runs(func, runs):
+    timings = []
+    result = None
+    for _ in range(runs):
+        started = time.perf_counter()
+        result = func()
+        timings.append((time.perf_counter() - started) * 1000)
+    return timings, result
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("fixtures", nargs="*", default=[os.path.join(FIXTURES_DIR, "gem_all_bids_page.html")])
+    parser.add_argument("--runs", type=int, default=20)
+    args = parser.parse_args()
+
+    bid_app = load_service("bid_api")
+    driver = bid_app.setup_driver()
+    try:
+        for fixture in args.fixtures:
+            driver.get("file://" + os.path.abspath(fixture))
+
+            def by_elements():
+                cards = driver.find_elements(By.CLASS_NAME, "card")
+                return bid_app.extract_cards_with_elements(cards, deadline=float("inf"))
+
+            def by_script():
+                return bid_app.extract_cards_with_script(driver)
+
+            element_ms, element_cards = time_runs(by_elements, args.runs)
+            script_ms, script_cards = time_runs(by_script, args.runs)
+
+            print(f"{os.path.basename(fixture)}: {len(script_cards)} cards, {args.runs} runs")
+            for label, timings in (("elements", element_ms), ("script", script_ms)):
+                print(f"  {label:<9} median {statistics.median(timings):8.1f} ms   "
+                      f"mean {statistics.mean(timings):8.1f} ms   max {max(timings):8.1f} ms")
+            print(f"  speedup   {statistics.median(element_ms) / statistics.median(script_ms):.1f}x")
+            print(f"  identical output: {element_cards == script_cards}")
+    finally:
+        driver.quit()
+
+
+if __name__ == "__main__":
+    main()
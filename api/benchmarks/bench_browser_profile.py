@@ -0,0 +1,99 @@
+"""Page-load time and bytes transferred with the full browser profile vs the lean one.
+
+Run:  python api/benchmarks/bench_browser_profile.py [--runs 5] [url ...]
+With no URLs, every fixture page is served from a local HTTP server so transfer sizes are real.
+Needs Chrome and chromedriver.
+"""
+import argparse
+import mimetypes
+import os
+import statistics
+import threading
+from http.server import SimpleHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import parse_qs, urlparse
+
+from _util import FIXTURES_DIR
+
+from selenium import webdriver
+from selenium.webdriver.chrome.options import Options as ChromeOptions
+
+from common.browser_profile import BrowserProfile, measure_page_load
+
+
+class FixtureHandler(SimpleHTTPRequestHandler):
+    """Serves fixture files, and synthetic bodies of ?kb= kilobytes for anything under /assets/."""
+
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, directory=FIXTURES_DIR, **kwargs)
+
+    def do_GET(self):
+        url = urlparse(self.path)
+        if not url.path.startswith("/assets/"):
+            return super().do_GET()
+        size = int(parse_qs(url.query).get("kb", ["50"])[0]) * 1024
+        self.send_response(200)
+        self.send_header("Content-Type", mimetypes.guess_type(url.path)[0] or "application/octet-stream")
+        self.send_header("Content-Length", str(size))
+        self.end_headers()
+        self.wfile.write(b"\0" * size)
+
+    def log_message(self, format, *args):
+        pass
+
+
+def start_fixture_server():
+    server = ThreadingHTTPServer(("127.0.0.1", 0), FixtureHandler)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    return server
+
+
+def launch(profile):
+    chrome_options = ChromeOptions()
+    chrome_options.add_argument("--headless")
+    chrome_options.add_argument("--no-sandbox")
+    chrome_options.add_argument("--disable-dev-shm-usage")
+    profile.apply_options(chrome_options)
+    return profile.apply_driver(webdriver.Chrome(options=chrome_options))
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("urls", nargs="*")
+    parser.add_argument("--runs", type=int, default=5)
+    args = parser.parse_args()
+
+    server = None
+    urls = args.urls
+    if not urls:
+        server = start_fixture_server()
+        base = f"http://127.0.0.1:{server.server_address[1]}/"
+        urls = [base + name for name in sorted(os.listdir(FIXTURES_DIR)) if name.endswith(".html")]
+
+    results = {}
+    for profile in (BrowserProfile("full"), BrowserProfile("lean")):
+        driver = launch(profile)
+        try:
+            for url in urls:
+                runs = []
+                for _ in range(args.runs):
+                    driver.execute_cdp_cmd("Network.clearBrowserCache", {})
+                    runs.append(measure_page_load(driver, url))
+                results[(profile.name, url)] = runs
+        finally:
+            driver.quit()
+
+    for url in urls:
+        print(url)
+        for name in ("full", "lean"):
+            runs = results[(name, url)]
+            load_ms = statistics.median(run["load_ms"] or 0 for run in runs)
+            kilobytes = statistics.median(run["bytes"] for run in runs) / 1024
+            requests = statistics.median(run["requests"] for run in runs)
+            print(f"  {name:<5} load {load_ms:8.1f} ms   transferred {kilobytes:9.1f} KB   requests {requests:4.0f}")
+
+    if server:
+        server.shutdown()
+
+
+if __name__ == "__main__":
+    main()
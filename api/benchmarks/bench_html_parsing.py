@@ -0,0 +1,63 @@
+"""Parse throughput of the auction and Google-result parsers: full html.parser tree vs strainer vs lxml XPath.
+
+Run:  python api/benchmarks/bench_html_parsing.py [--seconds 2]
+"""
+import argparse
+import logging
+import os
+import time
+
+from _util import FIXTURES_DIR, load_service
+
+from common.html_parsing import LXML_AVAILABLE
+
+
+def throughput(func, seconds):
+    calls = 0
+    started = time.perf_counter()
+    while time.perf_counter() - started < seconds:
+        func()
+        calls += 1
+    return calls / (time.perf_counter() - started)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--seconds", type=float, default=2.0, help="time spent on each variant")
+    args = parser.parse_args()
+
+    # userapi logs every result at DEBUG; keep the timings about parsing
+    logging.disable(logging.CRITICAL)
+
+    auction_app = load_service("auction_api")
+    user_app = load_service("userapi")
+
+    with open(os.path.join(FIXTURES_DIR, "forwardauction_search_page.html"), "rb") as f:
+        auction_page = f.read()
+    with open(os.path.join(FIXTURES_DIR, "google_linkedin_results.html"), encoding="utf-8") as f:
+        google_page = f.read()
+
+    cases = [
+        ("auction_api.parse_auctions", lambda **kw: auction_app.parse_auctions(auction_page, **kw),
+         auction_app.LISTING_STRAINER),
+        ("userapi.parse_profile_results", lambda **kw: user_app.parse_profile_results(google_page, **kw),
+         user_app.RESULT_STRAINER),
+    ]
+    variants = [("html.parser, restricted", "html.parser", True)]
+    if LXML_AVAILABLE:
+        variants.append(("lxml, XPath", "lxml", False))
+
+    for name, parse, strainer in cases:
+        baseline = parse(parser="html.parser", parse_only=None)
+        baseline_rate = throughput(lambda: parse(parser="html.parser", parse_only=None), args.seconds)
+        print(f"{name}: {len(baseline)} records")
+        print(f"  {'html.parser, full tree':<26} {baseline_rate:9.1f} pages/s")
+        for label, engine, restricted in variants:
+            kwargs = {"parser": engine, "parse_only": strainer if restricted else None}
+            output = parse(**kwargs)
+            rate = throughput(lambda: parse(**kwargs), args.seconds)
+            print(f"  {label:<26} {rate:9.1f} pages/s   "
+                  f"{rate / baseline_rate:4.1f}x   identical output: {output == baseline}")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,114 @@
+"""Per-request logging overhead of userapi's result parsing: old global DEBUG text logging vs the shared JSON setup.
+
+Run:  python api/benchmarks/bench_logging.py [--seconds 2]
+"""
+import argparse
+import logging
+import os
+import time
+
+from _util import FIXTURES_DIR, load_service
+
+from common.html_parsing import parse_html
+from common.search_gateway import RESULT_DIV_CLASSES
+from common.structured_logging import configure_logging
+
+
+def timed_requests(func, seconds):
+    calls = 0
+    started = time.perf_counter()
+    while time.perf_counter() - started < seconds:
+        func()
+        calls += 1
+    return (time.perf_counter() - started) / calls * 1000
+
+
+def use_old_debug_logging(sink):
+    # What userapi ran with before: basicConfig(level=DEBUG), a plain text handler and no sampling
+    logging.basicConfig(level=logging.DEBUG, stream=sink, force=True)
+
+
+def old_remove_duplicates(logger, profiles):
+    seen = set()
+    unique_profiles = []
+    for profile in profiles:
+        profile_key = (profile['name'].lower(), profile['linkedin_url'])
+        if profile_key not in seen:
+            seen.add(profile_key)
+            unique_profiles.append(profile)
+            logger.debug(f"Added unique profile: {profile['name']}")
+        else:
+            logger.debug(f"Skipped duplicate profile: {profile['name']}")
+    return unique_profiles
+
+
+def old_parse_profile_results(user_app, html_content, limit=15):
+    """userapi's parse_profile_results as it was, eager prettify() dump and per-item f-strings included."""
+    logger = user_app.logger
+    soup = parse_html(html_content)
+    profiles = []
+
+    logger.debug("HTML Content Structure:")
+    logger.debug(soup.prettify()[:1000])
+
+    result_divs = soup.find_all('div', {'class': RESULT_DIV_CLASSES})
+    logger.debug(f"Found {len(result_divs)} result divs")
+
+    for div in result_divs:
+        try:
+            link_element = div.find('a', href=True)
+            if not link_element or 'linkedin.com/in/' not in link_element['href']:
+                continue
+            title_element = div.find('h3')
+            summary_element = div.find('span', class_='aCOpRe')
+            profile_info = {
+                "name": user_app.clean_text(title_element.text) if title_element else "No title available",
+                "linkedin_url": link_element['href'].split('?')[0],
+                "about_section": user_app.clean_text(summary_element.text) if summary_element else "No summary available",
+            }
+            logger.debug(f"Found profile: {profile_info}")
+            profiles.append(profile_info)
+        except Exception as e:
+            logger.error(f"Error parsing profile div: {e}")
+
+    return old_remove_duplicates(logger, profiles)[:limit]
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--seconds", type=float, default=2.0, help="time spent on each variant")
+    args = parser.parse_args()
+
+    user_app = load_service("userapi")
+    with open(os.path.join(FIXTURES_DIR, "google_linkedin_results.html"), encoding="utf-8") as f:
+        google_page = f.read()
+
+    def handle_request():
+        # Both paths parse the full html.parser tree, which is what the DEBUG prettify() dump serializes
+        return user_app.parse_profile_results(google_page, parser="html.parser", parse_only=None)
+
+    def handle_old_request():
+        return old_parse_profile_results(user_app, google_page)
+
+    logging.disable(logging.CRITICAL)
+    print(f"identical output: {handle_old_request() == handle_request()}")
+
+    sink = open(os.devnull, "w")
+    variants = [
+        ("logging disabled", lambda: logging.disable(logging.CRITICAL), handle_request),
+        ("before: global DEBUG, text", lambda: use_old_debug_logging(sink), handle_old_request),
+        ("after: JSON, INFO", lambda: configure_logging("userapi", level="INFO", stream=sink), handle_request),
+        ("after: JSON, DEBUG sampled", lambda: configure_logging("userapi", level="DEBUG", stream=sink), handle_request),
+    ]
+
+    baseline = None
+    for label, setup, request in variants:
+        logging.disable(logging.NOTSET)
+        setup()
+        ms = timed_requests(request, args.seconds)
+        baseline = ms if baseline is None else baseline
+        print(f"{label:<30} {ms:8.3f} ms/request   logging overhead {ms - baseline:+8.3f} ms")
+
+
+if __name__ == "__main__":
+    main()
@@ -1,5 +1,5 @@
-from fastapi import FastAPI, HTTPException
-from pydantic import BaseModel
+from fastapi import FastAPI, HTTPException, Request
+from pydantic import BaseModel, Field
 from selenium import webdriver
 from selenium.webdriver.chrome.service import Service as ChromeService
 from selenium.webdriver.chrome.options import Options as ChromeOptions
@@ -8,16 +8,68 @@ from selenium.webdriver.common.keys import Keys
 from selenium.webdriver.support.ui import WebDriverWait
 from selenium.webdriver.support import expected_conditions as EC
 from selenium.common.exceptions import WebDriverException, TimeoutException, NoSuchElementException
+import os
+import re
+import math
+import sys
+import json
 import time
+import sqlite3
 import logging
-from typing import List, Dict
+import threading
+from contextlib import aclosing
+from datetime import datetime
+from queue import Queue, Empty
+from typing import List, Dict, Optional, Literal
+import requests
+from bs4 import BeautifulSoup
 from fastapi.middleware.cors import CORSMiddleware
 
+# Make api/common and this service's own modules importable whether it is started from its own folder or from api/
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+sys.path.append(os.path.dirname(os.path.abspath(__file__)))
+from common.browser_profile import load_browser_profile
+from common.driver_pool import DriverPool, PoolTimeout
+from common.single_flight import SingleFlight
+from common.streaming import stream_response, thread_events
+from common.structured_logging import CorrelationIdMiddleware, configure_logging, with_request_context
+from common.waits import wait_for_transition, wait_stats
+from bid_index import BidIndex
+
 # Set up logging
-logging.basicConfig(level=logging.INFO)
+configure_logging("bid_api")
 logger = logging.getLogger(__name__)
 
 app = FastAPI()
+app.add_middleware(CorrelationIdMiddleware)
+
+# Driver pool configuration
+DRIVER_POOL_SIZE = int(os.getenv("BID_DRIVER_POOL_SIZE", "2"))
+DRIVER_MAX_USES = int(os.getenv("BID_DRIVER_MAX_USES", "50"))
+DRIVER_MAX_RSS_MB = float(os.getenv("BID_DRIVER_MAX_RSS_MB", "1024"))
+DRIVER_ACQUIRE_TIMEOUT = float(os.getenv("BID_DRIVER_ACQUIRE_TIMEOUT", "30"))
+
+# "script" pulls a whole page of cards in one round-trip, "elements" walks them with find_element
+EXTRACTION_MODE = os.getenv("BID_EXTRACTION_MODE", "script")
+
+# "auto" tries the direct-HTTP engine first and falls back to Selenium, "http"/"selenium" force one
+SEARCH_ENGINE = os.getenv("BID_SEARCH_ENGINE", "auto")
+
+# Drivers a single Selenium search may spread its result pages over (capped by the pool size)
+PAGINATION_CONCURRENCY = int(os.getenv("BID_PAGINATION_CONCURRENCY", "1"))
+HTTP_TIMEOUT = float(os.getenv("BID_HTTP_TIMEOUT", "10"))
+
+# Local full-text index of open bids, refreshed by a background crawler
+INDEX_ENABLED = os.getenv("BID_INDEX_ENABLED", "1") == "1"
+INDEX_PATH = os.getenv("BID_INDEX_PATH", os.path.join(os.path.dirname(os.path.abspath(__file__)), "bids_index.sqlite3"))
+INDEX_REFRESH_INTERVAL = float(os.getenv("BID_INDEX_REFRESH_INTERVAL", "900"))
+INDEX_CRAWL_TIME_LIMIT = int(os.getenv("BID_INDEX_CRAWL_TIME_LIMIT", "1800"))
+INDEX_MAX_PAGES = int(os.getenv("BID_INDEX_MAX_PAGES", "1000"))
+INDEX_RESULT_LIMIT = int(os.getenv("BID_INDEX_RESULT_LIMIT", "200"))
+
+GEM_BIDS_URL = "https://bidplus.gem.gov.in/all-bids"
+GEM_BIDS_DATA_URL = "https://bidplus.gem.gov.in/all-bids-data"
+GEM_BID_DOCUMENT_URL = "https://bidplus.gem.gov.in/showbidDocument/"
 
 # Add CORS middleware
 app.add_middleware(
@@ -30,6 +82,9 @@ app.add_middleware(
 
 class SearchRequest(BaseModel):
     search_text: str
+    engine: Optional[Literal["auto", "http", "selenium"]] = None
+    concurrency: Optional[int] = Field(None, ge=1)  # drivers to paginate with in parallel
+    live: bool = False  # skip the local index and always fetch from GeM
 
 class BidCard(BaseModel):
     bid_number: str
@@ -42,68 +97,167 @@ class BidCard(BaseModel):
 
 class SearchResponse(BaseModel):
     results: List[BidCard]
+    engine: str
+
+browser_profile = load_browser_profile()
 
 def setup_driver():
     chrome_options = ChromeOptions()
     chrome_options.add_argument("--headless")
     chrome_options.add_argument("--no-sandbox")
     chrome_options.add_argument("--disable-dev-shm-usage")
-    
+    browser_profile.apply_options(chrome_options)
+
     try:
-        driver = webdriver.Chrome(options=chrome_options)
-        logger.info("WebDriver initialized successfully")
+        driver = browser_profile.apply_driver(webdriver.Chrome(options=chrome_options))
+        logger.info("WebDriver initialized successfully (%s profile)", browser_profile.name)
         return driver
     except WebDriverException as e:
-        logger.error(f"WebDriver exception: {str(e)}")
+        logger.error("WebDriver exception: %s", e)
         raise HTTPException(status_code=500, detail=f"Failed to initialize WebDriver: {str(e)}")
 
-def scrape_bid_cards(driver, time_limit: int = 30) -> List[Dict]:
+driver_pool = DriverPool(
+    setup_driver,
+    size=DRIVER_POOL_SIZE,
+    max_uses=DRIVER_MAX_USES,
+    max_rss_mb=DRIVER_MAX_RSS_MB,
+    acquire_timeout=DRIVER_ACQUIRE_TIMEOUT,
+    name="bid_api WebDriver",
+)
+
+@app.on_event("startup")
+def start_driver_pool():
+    driver_pool.start()
+
+@app.on_event("shutdown")
+def close_driver_pool():
+    driver_pool.close()
+
+# Mirrors the per-element extraction below, but runs in the page so a whole page costs one round-trip
+EXTRACT_CARDS_SCRIPT = """
+const text = (el) => (el.innerText || '').trim();
+const first = (parent, className) => {
+    const el = parent.getElementsByClassName(className)[0];
+    if (!el) throw new Error('no element with class ' + className);
+    return el;
+};
+const nth = (parent, className, index) => {
+    const el = parent.getElementsByClassName(className)[index];
+    if (!el) throw new Error('no ' + className + '[' + index + ']');
+    return el;
+};
+return Array.from(document.getElementsByClassName('card')).map((card) => {
+    try {
+        const bidNoTag = first(card, 'bid_no');
+        const bidLinkTag = bidNoTag.getElementsByTagName('a')[0];
+        if (!bidLinkTag) throw new Error('bid number has no link');
+
+        const colMd4 = first(card, 'col-md-4');
+        const itemRow = nth(colMd4, 'row', 0);
+        const itemLink = itemRow.getElementsByTagName('a')[0];
+        let items;
+        if (itemLink) {
+            const content = itemLink.getAttribute('data-content');
+            if (content === null) throw new Error('item link has no data-content');
+            items = content.trim();
+        } else {
+            const itemText = itemRow.innerText || '';
+            items = itemText.includes('Items:') ? itemText.trim().split('Items:').join('').trim() : 'N/A';
+        }
+
+        const colMd3 = first(card, 'col-md-3');
+        return {
+            bid_number: text(bidNoTag),
+            link: bidLinkTag.href,
+            items: items,
+            quantity: text(nth(colMd4, 'row', 1)),
+            department: text(nth(first(card, 'col-md-5'), 'row', 1)),
+            start_date: text(first(nth(colMd3, 'row', 0), 'start_date')),
+            end_date: text(first(nth(colMd3, 'row', 1), 'end_date'))
+        };
+    } catch (e) {
+        return {error: String(e)};
+    }
+});
+"""
+
+def extract_cards_with_script(driver) -> List[Dict]:
+    """Extract every card on the current page with a single execute_script call."""
     bid_cards_data = []
-    start_time = time.time()
+    for card in driver.execute_script(EXTRACT_CARDS_SCRIPT):
+        if "error" in card:
+            logger.error("Error scraping a card: %s", card['error'])
+            continue
+        card = {field: (value or "").strip() for field, value in card.items()}
+        card["bid_number"] = labelled_bid_number(card["bid_number"])
+        bid_cards_data.append(card)
+    return bid_cards_data
+
+def extract_cards_with_elements(cards, deadline: float) -> List[Dict]:
+    """Extract cards element by element; about 15 WebDriver round-trips per card."""
+    bid_cards_data = []
+    for card in cards:
+        if time.time() > deadline:
+            break
 
-    while True:
+        try:
+            bid_no_tag = card.find_element(By.CLASS_NAME, 'bid_no')
+            bid_no = labelled_bid_number(bid_no_tag.text)
+            bid_link = bid_no_tag.find_element(By.TAG_NAME, 'a').get_attribute('href')
+
+            col_md_4 = card.find_element(By.CLASS_NAME, 'col-md-4')
+            item_row = col_md_4.find_elements(By.CLASS_NAME, 'row')[0]
+            try:
+                items = item_row.find_element(By.TAG_NAME, 'a').get_attribute('data-content').strip()
+            except NoSuchElementException:
+                items = item_row.text.strip().replace('Items:', '').strip() if 'Items:' in item_row.text else "N/A"
+
+            quantity = col_md_4.find_elements(By.CLASS_NAME, 'row')[1].text.strip()
+
+            col_md_5 = card.find_element(By.CLASS_NAME, 'col-md-5')
+            dept_name = col_md_5.find_elements(By.CLASS_NAME, 'row')[1].text.strip()
+
+            col_md_3 = card.find_element(By.CLASS_NAME, 'col-md-3')
+            start_date = col_md_3.find_elements(By.CLASS_NAME, 'row')[0].find_element(By.CLASS_NAME, 'start_date').text.strip()
+            end_date = col_md_3.find_elements(By.CLASS_NAME, 'row')[1].find_element(By.CLASS_NAME, 'end_date').text.strip()
+
+            bid_cards_data.append({
+                "bid_number": bid_no,
+                "link": bid_link,
+                "items": items,
+                "quantity": quantity,
+                "department": dept_name,
+                "start_date": start_date,
+                "end_date": end_date
+            })
+        except Exception as e:
+            logger.error("Error scraping a card: %s", e)
+            continue
+    return bid_cards_data
+
+def iter_bid_card_pages(driver, time_limit: int = 30, extraction_mode: str = None, cancel_event: threading.Event = None,
+                        max_pages: int = None):
+    """Yield the cards of each result page as soon as it is parsed, then move to the next page."""
+    extraction_mode = extraction_mode or EXTRACTION_MODE
+    cancel_event = cancel_event or threading.Event()
+    deadline = time.time() + time_limit
+    pages_done = 0
+
+    while not cancel_event.is_set():
         try:
             cards = WebDriverWait(driver, 10).until(
                 EC.presence_of_all_elements_located((By.CLASS_NAME, 'card'))
             )
-            
-            for card in cards:
-                if time.time() - start_time > time_limit:
-                    return bid_cards_data
-
-                try:
-                    bid_no_tag = card.find_element(By.CLASS_NAME, 'bid_no')
-                    bid_no = bid_no_tag.text.strip()
-                    bid_link = bid_no_tag.find_element(By.TAG_NAME, 'a').get_attribute('href')
-
-                    col_md_4 = card.find_element(By.CLASS_NAME, 'col-md-4')
-                    item_row = col_md_4.find_elements(By.CLASS_NAME, 'row')[0]
-                    try:
-                        items = item_row.find_element(By.TAG_NAME, 'a').get_attribute('data-content').strip()
-                    except NoSuchElementException:
-                        items = item_row.text.strip().replace('Items:', '').strip() if 'Items:' in item_row.text else "N/A"
-
-                    quantity = col_md_4.find_elements(By.CLASS_NAME, 'row')[1].text.strip()
-
-                    col_md_5 = card.find_element(By.CLASS_NAME, 'col-md-5')
-                    dept_name = col_md_5.find_elements(By.CLASS_NAME, 'row')[1].text.strip()
-
-                    col_md_3 = card.find_element(By.CLASS_NAME, 'col-md-3')
-                    start_date = col_md_3.find_elements(By.CLASS_NAME, 'row')[0].find_element(By.CLASS_NAME, 'start_date').text.strip()
-                    end_date = col_md_3.find_elements(By.CLASS_NAME, 'row')[1].find_element(By.CLASS_NAME, 'end_date').text.strip()
-
-                    bid_cards_data.append({
-                        "bid_number": bid_no,
-                        "link": bid_link,
-                        "items": items,
-                        "quantity": quantity,
-                        "department": dept_name,
-                        "start_date": start_date,
-                        "end_date": end_date
-                    })
-                except Exception as e:
-                    logger.error(f"Error scraping a card: {str(e)}")
-                    continue
+
+            if time.time() > deadline:
+                return
+            if extraction_mode == "script":
+                yield extract_cards_with_script(driver)
+            else:
+                yield extract_cards_with_elements(cards, deadline)
+            pages_done += 1
+            if time.time() > deadline or cancel_event.is_set() or pages_done == max_pages:
+                return
 
             try:
                 next_button = WebDriverWait(driver, 5).until(
@@ -111,44 +265,473 @@ def scrape_bid_cards(driver, time_limit: int = 30) -> List[Dict]:
                 )
                 if "disabled" in next_button.get_attribute("class"):
                     break
+                first_card = cards[0]
                 next_button.click()
-                time.sleep(2)
+                wait_for_transition(driver, first_card, "bid_api.next_page")
             except Exception:
                 break
         except TimeoutException:
             logger.error("Timed out waiting for cards to load")
             break
 
+def scrape_bid_cards(driver, time_limit: int = 30, extraction_mode: str = None) -> List[Dict]:
+    bid_cards_data = []
+    for page in iter_bid_card_pages(driver, time_limit, extraction_mode):
+        bid_cards_data.extend(page)
     return bid_cards_data
 
-@app.post("/search", response_model=SearchResponse)
-async def search_bids(request: SearchRequest):
-    driver = None
+TOTAL_PAGES_SCRIPT = """
+const pager = document.getElementById('light-pagination');
+if (!pager) return 1;
+if (window.jQuery) {
+    try {
+        const count = window.jQuery(pager).pagination('getPagesCount');
+        if (count) return count;
+    } catch (e) {}
+}
+const numbers = Array.from(pager.querySelectorAll('.page-link'))
+    .map((el) => parseInt(el.textContent.trim(), 10))
+    .filter((n) => !isNaN(n));
+return numbers.length ? Math.max(...numbers) : 1;
+"""
+
+def get_total_pages(driver) -> int:
+    """Read the page count from the #light-pagination widget of the current result list."""
+    return int(driver.execute_script(TOTAL_PAGES_SCRIPT) or 1)
+
+def go_to_page(driver, page: int):
+    # The pager is a jQuery simplePagination widget, so jump straight to the page instead of clicking next
+    first_card = driver.find_element(By.CLASS_NAME, 'card')
+    driver.execute_script("window.jQuery('#light-pagination').pagination('selectPage', arguments[0]);", page)
+    wait_for_transition(driver, first_card, "bid_api.jump_to_page")
+
+def bare_bid_number(value: str) -> str:
+    return re.sub(r'^BID NO:\s*', '', value.strip(), flags=re.IGNORECASE).strip()
+
+def labelled_bid_number(value: str) -> str:
+    # The card text carries a "BID NO:" label that the JSON listing does not; every engine returns the card form
+    return f"BID NO: {bare_bid_number(value)}"
+
+def bid_key(card: Dict) -> str:
+    return bare_bid_number(card["bid_number"])
+
+class FastPathError(Exception):
+    """The direct-HTTP engine could not serve a search; callers fall back to Selenium."""
+
+engine_stats = {"index": 0, "http": 0, "selenium": 0, "fallbacks": 0}
+engine_stats_lock = threading.Lock()
+
+def record_engine(name):
+    with engine_stats_lock:
+        engine_stats[name] += 1
+
+def open_bid_search_session():
+    """Load the all-bids page once to pick up the session cookies and the CSRF token its AJAX calls send."""
+    session = requests.Session()
+    session.headers.update({
+        'User-Agent': 'Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/129.0.0.0 Safari/537.36',
+        'Referer': GEM_BIDS_URL,
+    })
+    response = session.get(GEM_BIDS_URL, timeout=HTTP_TIMEOUT)
+    if response.status_code != 200:
+        raise FastPathError(f"All-bids page returned {response.status_code}")
+
+    soup = BeautifulSoup(response.text, 'html.parser')
+    token_input = soup.find('input', {'name': re.compile('csrf')})
+    if not token_input or not token_input.get('value'):
+        raise FastPathError("CSRF token not found on the all-bids page")
+    return session, token_input['name'], token_input['value']
+
+def format_gem_date(value):
+    # The listing API returns ISO timestamps; the website shows them as dd-mm-YYYY hh:mm AM
     try:
-        driver = setup_driver()
-        logger.info(f"Searching for: {request.search_text}")
-        
-        home_url = "https://bidplus.gem.gov.in/all-bids"
-        driver.get(home_url)
-        
-        search_input = WebDriverWait(driver, 10).until(
-            EC.presence_of_element_located((By.ID, 'searchBid'))
+        return datetime.fromisoformat(value.replace("Z", "+00:00")).strftime("%d-%m-%Y %I:%M %p")
+    except ValueError:
+        return value
+
+def bid_card_from_doc(doc: Dict) -> Dict:
+    def field(key):
+        value = doc.get(key)
+        if isinstance(value, list):
+            value = value[0] if value else None
+        return str(value).strip() if value is not None else ""
+
+    bid_number = field("b_bid_number")
+    bid_id = field("b_id")
+    if not bid_number or not bid_id:
+        raise FastPathError("Unexpected bid document layout")
+
+    department = "\n".join(part for part in (field("ba_official_details_minName"), field("ba_official_details_deptName")) if part)
+    return {
+        "bid_number": labelled_bid_number(bid_number),
+        "link": GEM_BID_DOCUMENT_URL + bid_id,
+        "items": field("b_category_name") or "N/A",
+        "quantity": field("b_total_quantity"),
+        "department": department,
+        "start_date": format_gem_date(field("final_start_date_sort")),
+        "end_date": format_gem_date(field("final_end_date_sort")),
+    }
+
+def iter_bids_http(search_text: str, time_limit: int = 30, cancel_event: threading.Event = None,
+                   sort: str = "Bid-End-Date-Oldest", progress: Dict = None):
+    """Call the JSON endpoint behind the all-bids page directly, yielding one list of cards per page.
+
+    `progress["complete"]` is set once the whole listing has been read, as opposed to hitting the time limit.
+    """
+    cancel_event = cancel_event or threading.Event()
+    session, token_name, token = open_bid_search_session()
+    deadline = time.time() + time_limit
+    fetched = 0
+    page = 1
+
+    while time.time() < deadline and not cancel_event.is_set():
+        payload = {
+            "page": page,
+            "param": {"searchBid": search_text, "searchType": "fullText"},
+            "filter": {
+                "bidStatusType": "ongoing_bids",
+                "byType": "all",
+                "highBidValue": "",
+                "byEndDate": {"from": "", "to": ""},
+                "sort": sort,
+            },
+        }
+        response = session.post(
+            GEM_BIDS_DATA_URL,
+            data={"payload": json.dumps(payload), token_name: token},
+            headers={'X-Requested-With': 'XMLHttpRequest'},
+            timeout=HTTP_TIMEOUT,
         )
-        search_input.clear()
-        search_input.send_keys(request.search_text)
-        search_input.send_keys(Keys.RETURN)
+        if response.status_code != 200:
+            raise FastPathError(f"Bid listing endpoint returned {response.status_code}")
+
+        try:
+            listing = response.json()["response"]["response"]
+            docs = listing["docs"]
+            total = int(listing["numFound"])
+        except (ValueError, KeyError, TypeError) as e:
+            raise FastPathError(f"Unexpected bid listing response: {str(e)}")
+
+        yield [bid_card_from_doc(doc) for doc in docs]
+        fetched += len(docs)
+        if not docs or fetched >= total:
+            if progress is not None:
+                progress["complete"] = True
+            break
+        page += 1
 
-        time.sleep(2)
+def submit_search(driver, search_text: str):
+    driver.get(GEM_BIDS_URL)
 
-        bid_cards_data = scrape_bid_cards(driver)
-        return SearchResponse(results=[BidCard(**card) for card in bid_cards_data])
+    search_input = WebDriverWait(driver, 10).until(
+        EC.presence_of_element_located((By.ID, 'searchBid'))
+    )
+    # The unfiltered listing may already be rendered; its first card going stale marks the search results
+    initial_cards = driver.find_elements(By.CLASS_NAME, 'card')
+    search_input.clear()
+    search_input.send_keys(search_text)
+    search_input.send_keys(Keys.RETURN)
+
+    wait_for_transition(driver, initial_cards[0] if initial_cards else None, "bid_api.search_submit")
+
+def iter_bids_selenium(search_text: str, time_limit: int = 30, cancel_event: threading.Event = None, concurrency: int = 1):
+    if concurrency > 1:
+        yield from iter_bids_selenium_parallel(search_text, concurrency, time_limit, cancel_event)
+        return
+
+    # The driver goes back to the pool as soon as the generator finishes or is closed
+    with driver_pool.borrow() as driver:
+        submit_search(driver, search_text)
+
+        yielded = False
+        for page in iter_bid_card_pages(driver, time_limit, cancel_event=cancel_event):
+            yielded = True
+            yield page
+        if not yielded:
+            yield []
+
+def run_page_ranges(search_text, ranges, deadline, stop_event, results, driver=None):
+    """Worker: take (first_page, page_count) ranges off the `ranges` queue and scrape them on one driver.
+
+    A worker without a driver only borrows one the pool can hand out right away; otherwise it leaves the
+    ranges to the workers already holding a driver, so a busy pool slows the search down instead of dropping pages.
+    """
+    try:
+        if driver is None:
+            try:
+                driver = driver_pool.acquire(timeout=0)
+            except PoolTimeout:
+                logger.info("No spare driver for a parallel worker; the other workers take its pages")
+                return
+            if ranges.empty():
+                return
+            submit_search(driver, search_text)
+        current_page = 1
+        while not stop_event.is_set() and time.time() < deadline:
+            try:
+                first_page, page_count = ranges.get_nowait()
+            except Empty:
+                return
+            if first_page != current_page:
+                go_to_page(driver, first_page)
+            current_page = None
+            try:
+                pages = iter_bid_card_pages(driver, max(0.0, deadline - time.time()), cancel_event=stop_event,
+                                            max_pages=page_count)
+                for offset, cards in enumerate(pages):
+                    results.put((first_page + offset, cards))
+            except Exception as e:
+                logger.error("Error scraping pages %s-%s: %s", first_page, first_page + page_count - 1, e)
+                return
     except Exception as e:
-        logger.error(f"An error occurred: {str(e)}")
+        logger.error("Parallel worker failed: %s", e)
+    finally:
+        if driver is not None:
+            driver_pool.release(driver)
+        results.put(None)
+
+def iter_bids_selenium_parallel(search_text: str, concurrency: int, time_limit: int = 30, cancel_event: threading.Event = None):
+    """Fan the result pages out over several pooled drivers and yield each page, de-duplicated, as it lands.
+
+    Pages arrive in completion order rather than page order; every worker shares the same deadline.
+    """
+    cancel_event = cancel_event or threading.Event()
+    stop_event = threading.Event()
+    deadline = time.time() + time_limit
+    results = Queue()
+
+    driver = driver_pool.acquire()
+    try:
+        submit_search(driver, search_text)
+        total_pages = get_total_pages(driver)
+    except Exception:
+        driver_pool.release(driver)
+        raise
+
+    workers = max(1, min(concurrency, driver_pool.size, total_pages))
+    per_worker = math.ceil(total_pages / workers)
+    ranges = Queue()
+    for first in range(1, total_pages + 1, per_worker):
+        ranges.put((first, min(per_worker, total_pages - first + 1)))
+    workers = ranges.qsize()
+    logger.info("Scraping %s pages over up to %s drivers", total_pages, workers)
+
+    for index in range(workers):
+        threading.Thread(
+            target=with_request_context(run_page_ranges),
+            # The first worker reuses the driver that is already showing page 1
+            args=(search_text, ranges, deadline, stop_event, results, driver if index == 0 else None),
+            daemon=True,
+        ).start()
+
+    seen = set()
+    running = workers
+    try:
+        while running and not cancel_event.is_set():
+            try:
+                item = results.get(timeout=0.5)
+            except Empty:
+                continue
+            if item is None:
+                running -= 1
+                continue
+            _, cards = item
+            fresh = []
+            for card in cards:
+                key = bid_key(card)
+                if key not in seen:
+                    seen.add(key)
+                    fresh.append(card)
+            yield fresh
+    finally:
+        stop_event.set()
+
+bid_index = BidIndex(INDEX_PATH, key=bid_key) if INDEX_ENABLED else None
+index_crawler_stop = threading.Event()
+
+def index_cards(cards: List[Dict]) -> int:
+    if bid_index is None:
+        return 0
+    try:
+        return bid_index.upsert(cards)
+    except sqlite3.Error as e:
+        logger.error("Could not index bids: %s", e)
+        return 0
+
+def crawl_bid_index():
+    """One incremental pass over the newest open bids, stopping at the first page with nothing new."""
+    purged = bid_index.purge_expired()
+    ready = bid_index.is_ready()
+    pages = added = 0
+    progress = {}
+    caught_up = False
+    for page in iter_bids_http("", time_limit=INDEX_CRAWL_TIME_LIMIT, cancel_event=index_crawler_stop,
+                               sort="Bid-Start-Date-Latest", progress=progress):
+        pages += 1
+        new = index_cards(page)
+        added += new
+        # Until the first full crawl completes, keep going past bids we already know
+        if ready and new == 0:
+            caught_up = True
+            break
+        if pages >= INDEX_MAX_PAGES:
+            break
+    logger.info("Bid index crawl: %s pages, %s new bids, %s expired bids removed", pages, added, purged)
+    if index_crawler_stop.is_set():
+        return
+    if not (progress.get("complete") or caught_up):
+        # A pass cut short by the time or page limit leaves bids out; /search stays live until one is not
+        logger.warning("Bid index crawl stopped before the end of the listing after %s pages", pages)
+        return
+    completed_at = datetime.now().isoformat(timespec="seconds")
+    if not ready:
+        bid_index.set_meta("full_crawl_completed", completed_at)
+    bid_index.set_meta("last_crawl_completed", completed_at)
+
+def run_index_crawler():
+    while not index_crawler_stop.is_set():
+        try:
+            crawl_bid_index()
+        except Exception as e:
+            logger.error("Bid index crawl failed: %s", e)
+        index_crawler_stop.wait(INDEX_REFRESH_INTERVAL)
+
+@app.on_event("startup")
+def start_index_crawler():
+    if bid_index is not None:
+        threading.Thread(target=run_index_crawler, daemon=True).start()
+
+@app.on_event("shutdown")
+def stop_index_crawler():
+    index_crawler_stop.set()
+
+def iter_search_pages(search_text: str, engine: str, cancel_event: threading.Event = None, concurrency: int = 1,
+                      use_index: bool = False):
+    """Yield (engine, cards) per result page, from the local index or the HTTP engine first when allowed.
+
+    Falls back to Selenium only if the HTTP engine fails before producing any page;
+    a failure after that ends the search with the pages already delivered. Live
+    pages are written through to the index.
+    """
+    if use_index and bid_index is not None and bid_index.is_ready():
+        record_engine("index")
+        yield "index", bid_index.search(search_text, INDEX_RESULT_LIMIT)
+        return
+
+    if engine in ("auto", "http"):
+        yielded = False
+        try:
+            for page in iter_bids_http(search_text, cancel_event=cancel_event):
+                if not yielded:
+                    record_engine("http")
+                    yielded = True
+                index_cards(page)
+                yield "http", page
+            return
+        except (FastPathError, requests.RequestException) as e:
+            if engine == "http":
+                raise FastPathError(f"HTTP engine failed: {str(e)}")
+            if yielded:
+                logger.warning("HTTP engine failed mid-search, returning partial results: %s", e)
+                return
+            logger.warning("HTTP engine failed, falling back to Selenium: %s", e)
+            record_engine("fallbacks")
+
+    record_engine("selenium")
+    for page in iter_bids_selenium(search_text, cancel_event=cancel_event, concurrency=concurrency):
+        index_cards(page)
+        yield "selenium", page
+
+def use_local_index(request: SearchRequest) -> bool:
+    # Forcing an engine implies a live fetch
+    return not request.live and request.engine is None
+
+# Identical searches running at the same time share one scrape (and one driver)
+search_flights = SingleFlight()
+
+def search_flight_key(search_text: str, engine: str, use_index: bool) -> str:
+    # GeM matches keywords case-insensitively; concurrency changes how pages are fetched, not which
+    return f"{engine}|{int(use_index)}|{' '.join(search_text.split()).lower()}"
+
+def collect_search_pages(search_text: str, engine: str, concurrency: int, use_index: bool):
+    bid_cards_data = []
+    served_by = engine
+    for served_by, page in iter_search_pages(search_text, engine, concurrency=concurrency, use_index=use_index):
+        bid_cards_data.extend(page)
+    return bid_cards_data, served_by
+
+@app.post("/search", response_model=SearchResponse)
+def search_bids(request: SearchRequest):
+    # Plain def: FastAPI runs it in the threadpool, so concurrent searches can each hold a pooled driver
+    engine = request.engine or SEARCH_ENGINE
+    logger.info("Searching for: %s (engine: %s)", request.search_text, engine)
+
+    try:
+        use_index = use_local_index(request)
+        (bid_cards_data, served_by), shared = search_flights.do(
+            search_flight_key(request.search_text, engine, use_index),
+            collect_search_pages, request.search_text, engine, request.concurrency or PAGINATION_CONCURRENCY, use_index,
+        )
+        if shared:
+            logger.info("Answered by a concurrent search for: %s", request.search_text)
+        return SearchResponse(results=[BidCard(**card) for card in bid_cards_data], engine=served_by)
+    except FastPathError as e:
+        logger.error(str(e))
+        raise HTTPException(status_code=502, detail=str(e))
+    except PoolTimeout as e:
+        logger.error("Driver pool exhausted: %s", e)
+        raise HTTPException(status_code=503, detail=str(e))
+    except Exception as e:
+        logger.error("An error occurred: %s", e)
         raise HTTPException(status_code=500, detail=f"An error occurred: {str(e)}")
+
+def produce_search_pages(emit, cancel_event, search_text, engine, concurrency, use_index):
+    """Run the blocking scrape in a worker thread, emitting each page as it is read."""
+    pages = iter_search_pages(search_text, engine, cancel_event, concurrency, use_index)
+    try:
+        for served_by, page in pages:
+            if cancel_event.is_set():
+                break
+            emit("page", {"engine": served_by, "cards": page})
     finally:
-        if driver:
-            driver.quit()
-            logger.info("WebDriver closed")
+        # Closing the generator returns the borrowed driver to the pool right away
+        pages.close()
+
+@app.post("/search/stream")
+async def stream_search_bids(request: SearchRequest, raw_request: Request, format: Literal["ndjson", "sse"] = "ndjson"):
+    engine = request.engine or SEARCH_ENGINE
+    logger.info("Streaming search for: %s (engine: %s)", request.search_text, engine)
+
+    async def events():
+        page_number = 0
+        total = 0
+        produced = thread_events(produce_search_pages, request.search_text, engine,
+                                 request.concurrency or PAGINATION_CONCURRENCY, use_local_index(request))
+        async with aclosing(produced):
+            async for kind, data in produced:
+                if kind == "page":
+                    page_number += 1
+                    total += len(data["cards"])
+                    cards = [BidCard(**card).model_dump() for card in data["cards"]]
+                    data = {"page": page_number, "engine": data["engine"], "results": cards}
+                yield kind, data
+        yield "done", {"pages": page_number, "results": total}
+
+    return stream_response(events(), format, raw_request, f"search for: {request.search_text}")
+
+@app.get("/stats")
+def get_stats():
+    with engine_stats_lock:
+        engines = dict(engine_stats)
+    served = engines["http"] + engines["selenium"]
+    engines["fast_path_hit_rate"] = round(engines["http"] / served, 3) if served else None
+    return {
+        "driver_pool": driver_pool.stats(),
+        "engines": engines,
+        "waits": wait_stats.snapshot(),
+        "index": bid_index.stats() if bid_index is not None else None,
+        "single_flight": search_flights.stats(),
+    }
 
 if __name__ == "__main__":
     import uvicorn
@@ -0,0 +1,151 @@
+import re
+import sqlite3
+import threading
+import time
+from datetime import datetime, timedelta, timezone
+from typing import Callable, Dict, Iterable, List
+
+# GeM shows every date in Indian Standard Time
+IST = timezone(timedelta(hours=5, minutes=30))
+GEM_DATE_PATTERN = re.compile(r'\d{1,2}-\d{1,2}-\d{4}\s+\d{1,2}:\d{2}\s*[AP]M', re.IGNORECASE)
+
+CARD_FIELDS = ("bid_number", "link", "items", "quantity", "department", "start_date", "end_date")
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS bids (
+    bid_key TEXT PRIMARY KEY,
+    bid_number TEXT NOT NULL,
+    link TEXT,
+    items TEXT,
+    quantity TEXT,
+    department TEXT,
+    start_date TEXT,
+    end_date TEXT,
+    end_ts REAL,
+    indexed_at REAL NOT NULL
+);
+CREATE INDEX IF NOT EXISTS bids_end_ts ON bids(end_ts);
+CREATE VIRTUAL TABLE IF NOT EXISTS bids_fts USING fts5(
+    bid_number, items, department, content='bids', content_rowid='rowid'
+);
+CREATE TRIGGER IF NOT EXISTS bids_ai AFTER INSERT ON bids BEGIN
+    INSERT INTO bids_fts(rowid, bid_number, items, department)
+    VALUES (new.rowid, new.bid_number, new.items, new.department);
+END;
+CREATE TRIGGER IF NOT EXISTS bids_ad AFTER DELETE ON bids BEGIN
+    INSERT INTO bids_fts(bids_fts, rowid, bid_number, items, department)
+    VALUES ('delete', old.rowid, old.bid_number, old.items, old.department);
+END;
+CREATE TRIGGER IF NOT EXISTS bids_au AFTER UPDATE ON bids BEGIN
+    INSERT INTO bids_fts(bids_fts, rowid, bid_number, items, department)
+    VALUES ('delete', old.rowid, old.bid_number, old.items, old.department);
+    INSERT INTO bids_fts(rowid, bid_number, items, department)
+    VALUES (new.rowid, new.bid_number, new.items, new.department);
+END;
+CREATE TABLE IF NOT EXISTS meta (key TEXT PRIMARY KEY, value TEXT);
+"""
+
+
+def parse_end_timestamp(value: str):
+    match = GEM_DATE_PATTERN.search(value or "")
+    if not match:
+        return None
+    normalized = " ".join(match.group().upper().replace("AM", " AM").replace("PM", " PM").split())
+    try:
+        return datetime.strptime(normalized, "%d-%m-%Y %I:%M %p").replace(tzinfo=IST).timestamp()
+    except ValueError:
+        return None
+
+
+def fts_query(text: str) -> str:
+    # Quote every token so user input can never be read as FTS5 syntax; prefix-match each one
+    return " ".join(f'"{token}"*' for token in re.findall(r'\w+', text))
+
+
+class BidIndex:
+    """SQLite FTS5 index of open GeM bids, keyed by bid number."""
+
+    def __init__(self, path: str, key: Callable[[Dict], str]):
+        self.path = path
+        self.key = key
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(path, check_same_thread=False)
+        self._conn.row_factory = sqlite3.Row
+        with self._lock, self._conn:
+            self._conn.executescript(SCHEMA)
+
+    def upsert(self, cards: Iterable[Dict]) -> int:
+        """Insert or refresh cards; returns how many bid numbers were not in the index before."""
+        now = time.time()
+        rows = [
+            (self.key(card), *(card[field] for field in CARD_FIELDS), parse_end_timestamp(card["end_date"]), now)
+            for card in cards
+        ]
+        if not rows:
+            return 0
+        with self._lock, self._conn:
+            keys = [row[0] for row in rows]
+            placeholders = ",".join("?" * len(keys))
+            known = {row[0] for row in self._conn.execute(
+                f"SELECT bid_key FROM bids WHERE bid_key IN ({placeholders})", keys)}
+            self._conn.executemany(
+                """
+                INSERT INTO bids (bid_key, bid_number, link, items, quantity, department, start_date, end_date, end_ts, indexed_at)
+                VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
+                ON CONFLICT(bid_key) DO UPDATE SET
+                    bid_number = excluded.bid_number, link = excluded.link, items = excluded.items,
+                    quantity = excluded.quantity, department = excluded.department,
+                    start_date = excluded.start_date, end_date = excluded.end_date,
+                    end_ts = excluded.end_ts, indexed_at = excluded.indexed_at
+                """,
+                rows,
+            )
+        return len(set(keys) - known)
+
+    def search(self, text: str, limit: int = 200) -> List[Dict]:
+        now = time.time()
+        query = fts_query(text)
+        columns = ", ".join(f"bids.{field}" for field in CARD_FIELDS)
+        with self._lock:
+            if query:
+                rows = self._conn.execute(
+                    f"""
+                    SELECT {columns} FROM bids_fts JOIN bids ON bids.rowid = bids_fts.rowid
+                    WHERE bids_fts MATCH ? AND (bids.end_ts IS NULL OR bids.end_ts > ?)
+                    ORDER BY bm25(bids_fts) LIMIT ?
+                    """,
+                    (query, now, limit),
+                ).fetchall()
+            else:
+                rows = self._conn.execute(
+                    f"SELECT {columns} FROM bids WHERE end_ts IS NULL OR end_ts > ? ORDER BY end_ts LIMIT ?",
+                    (now, limit),
+                ).fetchall()
+        return [dict(row) for row in rows]
+
+    def purge_expired(self) -> int:
+        with self._lock, self._conn:
+            return self._conn.execute("DELETE FROM bids WHERE end_ts IS NOT NULL AND end_ts <= ?", (time.time(),)).rowcount
+
+    def get_meta(self, key: str, default=None):
+        with self._lock:
+            row = self._conn.execute("SELECT value FROM meta WHERE key = ?", (key,)).fetchone()
+        return row[0] if row else default
+
+    def set_meta(self, key: str, value: str):
+        with self._lock, self._conn:
+            self._conn.execute("INSERT OR REPLACE INTO meta (key, value) VALUES (?, ?)", (key, value))
+
+    def is_ready(self) -> bool:
+        """True once a crawl has read the whole listing, so the index can answer searches on its own."""
+        return self.get_meta("full_crawl_completed") is not None
+
+    def stats(self) -> Dict:
+        with self._lock:
+            count = self._conn.execute("SELECT COUNT(*) FROM bids").fetchone()[0]
+        return {
+            "bids": count,
+            "ready": self.is_ready(),
+            "full_crawl_completed": self.get_meta("full_crawl_completed"),
+            "last_crawl_completed": self.get_meta("last_crawl_completed"),
+        }
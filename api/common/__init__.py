@@ -0,0 +1 @@
+# Helpers shared by the scraper services in api/
@@ -0,0 +1,105 @@
+import logging
+import os
+
+from selenium.common.exceptions import WebDriverException
+
+logger = logging.getLogger(__name__)
+
+IMAGE_PATTERNS = ["*.png", "*.jpg", "*.jpeg", "*.gif", "*.webp", "*.svg", "*.ico", "*.avif"]
+FONT_PATTERNS = ["*.woff", "*.woff2", "*.ttf", "*.otf", "*.eot"]
+MEDIA_PATTERNS = ["*.mp4", "*.webm", "*.mp3", "*.m3u8"]
+STYLESHEET_PATTERNS = ["*.css"]
+TRACKER_PATTERNS = [
+    "*google-analytics.com*", "*googletagmanager.com*", "*doubleclick.net*", "*googlesyndication.com*",
+    "*connect.facebook.net*", "*hotjar.com*", "*clarity.ms*", "*px.ads.linkedin.com*", "*snap.licdn.com*",
+]
+
+LEAN_CHROME_ARGS = [
+    "--disable-extensions",
+    "--disable-gpu",
+    "--disable-background-networking",
+    "--disable-background-timer-throttling",
+    "--disable-component-update",
+    "--disable-default-apps",
+    "--disable-sync",
+    "--disable-notifications",
+    "--disable-features=Translate,MediaRouter,OptimizationHints",
+    "--mute-audio",
+    "--no-first-run",
+    "--blink-settings=imagesEnabled=false",
+]
+
+# Measured after a page load: navigation timing plus the bytes every resource pulled over the wire
+PAGE_LOAD_METRICS_SCRIPT = """
+const nav = performance.getEntriesByType('navigation')[0];
+const resources = performance.getEntriesByType('resource');
+return {
+    load_ms: nav ? nav.loadEventEnd - nav.startTime : null,
+    dom_content_loaded_ms: nav ? nav.domContentLoadedEventEnd - nav.startTime : null,
+    requests: resources.length + 1,
+    bytes: resources.reduce((sum, r) => sum + (r.transferSize || 0), nav ? nav.transferSize || 0 : 0)
+};
+"""
+
+
+class BrowserProfile:
+    """Chrome settings for a scraper: "full" loads everything, "lean" blocks what scraping never reads."""
+
+    def __init__(self, name="lean", block_stylesheets=False, extra_blocked=()):
+        self.name = name
+        self.block_stylesheets = block_stylesheets
+        self.extra_blocked = list(extra_blocked)
+
+    @property
+    def lean(self):
+        return self.name == "lean"
+
+    def blocked_patterns(self):
+        if not self.lean:
+            return []
+        patterns = IMAGE_PATTERNS + FONT_PATTERNS + MEDIA_PATTERNS + TRACKER_PATTERNS + self.extra_blocked
+        if self.block_stylesheets:
+            patterns += STYLESHEET_PATTERNS
+        return patterns
+
+    def apply_options(self, chrome_options):
+        """Add launch flags and prefs; call before the driver is created."""
+        if not self.lean:
+            return chrome_options
+        for argument in LEAN_CHROME_ARGS:
+            chrome_options.add_argument(argument)
+        chrome_options.add_experimental_option("prefs", {
+            "profile.managed_default_content_settings.images": 2,
+            "profile.default_content_setting_values.notifications": 2,
+        })
+        return chrome_options
+
+    def apply_driver(self, driver):
+        """Block non-essential requests through CDP; call once the driver is running."""
+        patterns = self.blocked_patterns()
+        if not patterns:
+            return driver
+        try:
+            driver.execute_cdp_cmd("Network.enable", {})
+            driver.execute_cdp_cmd("Network.setBlockedURLs", {"urls": patterns})
+        except WebDriverException as e:
+            logger.warning("Could not install URL blocking: %s", e)
+        return driver
+
+
+def load_browser_profile():
+    """Build the profile from BROWSER_PROFILE, BROWSER_BLOCK_STYLESHEETS and BROWSER_BLOCKED_URLS."""
+    extra = [pattern.strip() for pattern in os.getenv("BROWSER_BLOCKED_URLS", "").split(",") if pattern.strip()]
+    return BrowserProfile(
+        name=os.getenv("BROWSER_PROFILE", "lean"),
+        block_stylesheets=os.getenv("BROWSER_BLOCK_STYLESHEETS", "0") == "1",
+        extra_blocked=extra,
+    )
+
+
+def measure_page_load(driver, url):
+    """Load `url` and report its load time, request count and bytes transferred."""
+    driver.get(url)
+    metrics = driver.execute_script(PAGE_LOAD_METRICS_SCRIPT)
+    metrics["url"] = url
+    return metrics
@@ -0,0 +1,285 @@
+import logging
+import threading
+import time
+from collections import deque
+from contextlib import contextmanager
+
+from selenium.common.exceptions import WebDriverException
+
+try:
+    import psutil
+except ImportError:  # RSS based recycling is simply skipped without psutil
+    psutil = None
+
+logger = logging.getLogger(__name__)
+
+
+class PoolTimeout(Exception):
+    """Raised when no driver becomes free within the acquire timeout."""
+
+
+def driver_rss_mb(driver):
+    """Resident memory of chromedriver plus every browser process it spawned, in MB."""
+    if psutil is None:
+        return None
+    try:
+        root = psutil.Process(driver.service.process.pid)
+        total = 0
+        for proc in [root] + root.children(recursive=True):
+            try:
+                total += proc.memory_info().rss
+            except psutil.Error:
+                continue
+        return total / (1024 * 1024)
+    except (psutil.Error, AttributeError):
+        return None
+
+
+def close_extra_tabs(driver):
+    handles = driver.window_handles
+    for handle in handles[1:]:
+        driver.switch_to.window(handle)
+        driver.close()
+    driver.switch_to.window(handles[0])
+
+
+def reset_tabs(driver):
+    """Close extra tabs but keep cookies and storage, for pools of logged-in sessions."""
+    close_extra_tabs(driver)
+    driver.get("about:blank")
+
+
+def reset_browser_state(driver):
+    """Close extra tabs and wipe cookies/storage so the next borrower starts clean."""
+    close_extra_tabs(driver)
+
+    try:
+        driver.execute_script("window.localStorage.clear(); window.sessionStorage.clear();")
+    except WebDriverException:
+        pass  # about:blank and some error pages have no storage
+    try:
+        # Clears cookies for every domain, not just the one currently loaded
+        driver.execute_cdp_cmd("Network.clearBrowserCookies", {})
+    except (WebDriverException, AttributeError):
+        driver.delete_all_cookies()
+    driver.get("about:blank")
+
+
+def is_driver_alive(driver):
+    try:
+        driver.current_url
+        return True
+    except WebDriverException:
+        return False
+
+
+class DriverPool:
+    """Bounded pool of pre-launched WebDriver instances that requests borrow and return.
+
+    Drivers are health-checked when handed out, reset when returned, and replaced
+    after `max_uses` borrows or once their process tree grows past `max_rss_mb`.
+    `on_quit(driver)` runs after every driver the pool shuts down, e.g. to free resources the factory claimed.
+    """
+
+    def __init__(self, factory, size=2, max_uses=50, max_rss_mb=None, acquire_timeout=30.0,
+                 reset=reset_browser_state, name="driver", on_quit=None):
+        self.factory = factory
+        self.size = size
+        self.max_uses = max_uses
+        self.max_rss_mb = max_rss_mb
+        self.acquire_timeout = acquire_timeout
+        self.reset = reset
+        self.name = name
+        self.on_quit = on_quit
+        if max_rss_mb and psutil is None:
+            logger.warning("psutil is not installed; %s pool will not recycle drivers past %s MB RSS", name, max_rss_mb)
+
+        self._cond = threading.Condition()
+        self._idle = deque()
+        self._uses = {}
+        self._total = 0  # idle + borrowed + still starting
+        self._borrowed = 0
+        self._waiting = 0
+        self._closed = False
+
+        self._counters = {"created": 0, "recycled": 0, "failed_health_checks": 0,
+                          "acquired": 0, "timeouts": 0}
+        self._wait_total = 0.0
+        self._wait_max = 0.0
+        self._wait_last = 0.0
+
+    def start(self):
+        """Launch drivers up front so the first requests skip Chrome's cold start."""
+        for _ in range(self.size):
+            if not self._reserve_slot():
+                break
+            try:
+                driver = self._create()
+            except Exception as e:
+                logger.error("Could not pre-launch %s: %s", self.name, e)
+                break
+            self._put_idle(driver)
+        logger.info("%s pool started with %s idle driver(s)", self.name, len(self._idle))
+
+    def close(self):
+        with self._cond:
+            self._closed = True
+            drivers = list(self._idle)
+            self._idle.clear()
+            self._total -= len(drivers)
+            self._cond.notify_all()
+        for driver in drivers:
+            self._quit(driver)
+
+    @contextmanager
+    def borrow(self, timeout=None):
+        driver = self.acquire(timeout)
+        try:
+            yield driver
+        finally:
+            self.release(driver)
+
+    def acquire(self, timeout=None):
+        timeout = self.acquire_timeout if timeout is None else timeout
+        started = time.monotonic()
+        deadline = started + timeout
+
+        while True:
+            driver = None
+            with self._cond:
+                while not self._idle:
+                    if self._closed:
+                        raise PoolTimeout(f"{self.name} pool is closed")
+                    if self._total < self.size:
+                        self._total += 1
+                        break
+                    remaining = deadline - time.monotonic()
+                    if remaining <= 0:
+                        self._counters["timeouts"] += 1
+                        raise PoolTimeout(f"No {self.name} became available within {timeout:.0f}s")
+                    self._waiting += 1
+                    self._cond.wait(remaining)
+                    self._waiting -= 1
+                else:
+                    driver = self._idle.popleft()
+
+            if driver is None:
+                # A slot was reserved above; launch a fresh driver outside the lock
+                driver = self._create()
+                break
+            if is_driver_alive(driver):
+                break
+            logger.warning("Discarding unhealthy %s", self.name)
+            with self._cond:
+                self._counters["failed_health_checks"] += 1
+            self._discard(driver)
+
+        waited = time.monotonic() - started
+        with self._cond:
+            self._borrowed += 1
+            self._counters["acquired"] += 1
+            self._wait_total += waited
+            self._wait_max = max(self._wait_max, waited)
+            self._wait_last = waited
+        return driver
+
+    def release(self, driver):
+        with self._cond:
+            self._borrowed -= 1
+            self._uses[driver] = self._uses.get(driver, 0) + 1
+            uses = self._uses[driver]
+
+        reason = None
+        if uses >= self.max_uses:
+            reason = f"reached {uses} uses"
+        elif self.max_rss_mb:
+            rss = driver_rss_mb(driver)
+            if rss is not None and rss > self.max_rss_mb:
+                reason = f"RSS {rss:.0f} MB exceeds {self.max_rss_mb} MB"
+        if reason is None:
+            try:
+                self.reset(driver)
+            except Exception as e:
+                reason = f"reset failed: {str(e)}"
+
+        if reason is not None:
+            logger.info("Recycling %s: %s", self.name, reason)
+            with self._cond:
+                self._counters["recycled"] += 1
+            self._discard(driver)
+            self._replenish_async()
+            return
+        self._put_idle(driver)
+
+    def stats(self):
+        with self._cond:
+            acquired = self._counters["acquired"]
+            return {
+                "size": self.size,
+                "idle": len(self._idle),
+                "in_use": self._borrowed,
+                "starting": self._total - len(self._idle) - self._borrowed,
+                "waiting": self._waiting,
+                **self._counters,
+                "wait_ms": {
+                    "last": round(self._wait_last * 1000, 1),
+                    "avg": round(self._wait_total / acquired * 1000, 1) if acquired else 0.0,
+                    "max": round(self._wait_max * 1000, 1),
+                },
+            }
+
+    def _reserve_slot(self):
+        with self._cond:
+            if self._closed or self._total >= self.size:
+                return False
+            self._total += 1
+            return True
+
+    def _create(self):
+        # The caller must already hold a reserved slot in self._total
+        try:
+            driver = self.factory()
+        except Exception:
+            with self._cond:
+                self._total -= 1
+                self._cond.notify()
+            raise
+        with self._cond:
+            self._uses[driver] = 0
+            self._counters["created"] += 1
+        return driver
+
+    def _put_idle(self, driver):
+        with self._cond:
+            if not self._closed:
+                self._idle.append(driver)
+                self._cond.notify()
+                return
+        self._discard(driver)
+
+    def _discard(self, driver):
+        self._quit(driver)
+        with self._cond:
+            self._total -= 1
+            self._uses.pop(driver, None)
+            self._cond.notify()
+
+    def _replenish_async(self):
+        if not self._reserve_slot():
+            return
+
+        def replenish():
+            try:
+                self._put_idle(self._create())
+            except Exception as e:
+                logger.error("Could not replace recycled %s: %s", self.name, e)
+
+        threading.Thread(target=replenish, daemon=True).start()
+
+    def _quit(self, driver):
+        try:
+            driver.quit()
+        except Exception as e:
+            logger.warning("Error while quitting %s: %s", self.name, e)
+        if self.on_quit is not None:
+            self.on_quit(driver)
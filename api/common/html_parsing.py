@@ -0,0 +1,57 @@
+import os
+
+from bs4 import BeautifulSoup, SoupStrainer
+from bs4.dammit import UnicodeDammit
+
+try:
+    import lxml.html
+    LXML_AVAILABLE = True
+except ImportError:
+    LXML_AVAILABLE = False
+
+# "lxml" walks a C-built lxml tree with XPath; "html.parser" builds a BeautifulSoup tree in
+# pure Python, restricted to the containers a parser reads. "auto" picks lxml when installed.
+HTML_PARSER = os.getenv("HTML_PARSER", "auto")
+
+
+def default_parser():
+    if HTML_PARSER == "auto":
+        return "lxml" if LXML_AVAILABLE else "html.parser"
+    return HTML_PARSER
+
+
+def parse_html(markup, parse_only=None, parser="html.parser"):
+    """Build a BeautifulSoup tree.
+
+    `parse_only` (a SoupStrainer) keeps just the matching elements and their subtrees,
+    which skips building the rest of the page.
+    """
+    return BeautifulSoup(markup, parser, parse_only=parse_only)
+
+
+def only(name, **attrs):
+    """Shorthand for a SoupStrainer, so callers don't import bs4 just for that."""
+    return SoupStrainer(name, **attrs)
+
+
+def lxml_document(markup):
+    """Parse with lxml, decoding bytes the same way BeautifulSoup does so text comes out identical."""
+    if isinstance(markup, bytes):
+        markup = UnicodeDammit(markup, is_html=True).unicode_markup
+    return lxml.html.document_fromstring(markup.encode("utf-8"), parser=lxml.html.HTMLParser(encoding="utf-8"))
+
+
+def has_class(name):
+    """XPath predicate matching one entry of the class attribute, like BeautifulSoup's class_=."""
+    return f"contains(concat(' ', normalize-space(@class), ' '), ' {name} ')"
+
+
+def first(element, xpath):
+    """First XPath match in document order, or None, like BeautifulSoup's find()."""
+    matches = element.xpath(xpath)
+    return matches[0] if matches else None
+
+
+def text_of(element):
+    """All text under the element, like BeautifulSoup's .text, which skips comments and script/style/template contents."""
+    return "".join(element.xpath(".//text()[not(ancestor::script or ancestor::style or ancestor::template)]"))
@@ -0,0 +1,43 @@
+import threading
+import time
+
+
+class RateLimiter:
+    """Spaces calls at least 60 / `per_minute` seconds apart, across every thread that shares it."""
+
+    def __init__(self, per_minute: float):
+        self.interval = 60.0 / per_minute if per_minute and per_minute > 0 else 0.0
+        self._lock = threading.Lock()
+        self._next_slot = 0.0
+        self._waits = 0
+        self._waited = 0.0
+
+    def reserve(self) -> float:
+        """Claim the next free slot and return how many seconds the caller must wait for it."""
+        with self._lock:
+            now = time.monotonic()
+            slot = max(now, self._next_slot)
+            self._next_slot = slot + self.interval
+            delay = slot - now
+            if delay > 0:
+                self._waits += 1
+                self._waited += delay
+            return delay
+
+    def wait(self, cancel_event=None) -> float:
+        """Block until this caller's slot; returns the seconds slept (less if `cancel_event` fires)."""
+        delay = self.reserve()
+        if delay > 0:
+            if cancel_event is not None:
+                cancel_event.wait(delay)
+            else:
+                time.sleep(delay)
+        return delay
+
+    def stats(self):
+        with self._lock:
+            return {
+                "per_minute": round(60.0 / self.interval, 2) if self.interval else None,
+                "waits": self._waits,
+                "waited_seconds": round(self._waited, 1),
+            }
@@ -0,0 +1,329 @@
+import logging
+import os
+import threading
+import time
+from abc import ABC, abstractmethod
+from collections import deque
+from concurrent.futures import FIRST_COMPLETED, ThreadPoolExecutor, wait
+from typing import Dict, List, NamedTuple
+
+import requests
+from requests.adapters import HTTPAdapter
+
+from common.html_parsing import default_parser, first, has_class, lxml_document, only, parse_html, text_of
+from common.rate_limit import RateLimiter
+
+logger = logging.getLogger(__name__)
+
+SEARCH_TIMEOUT = float(os.getenv("SEARCH_TIMEOUT", "10"))
+# A second backend is asked once the first has taken longer than this percentile of its recent latencies
+HEDGE_PERCENTILE = float(os.getenv("SEARCH_HEDGE_PERCENTILE", "95"))
+HEDGE_MIN_SAMPLES = int(os.getenv("SEARCH_HEDGE_MIN_SAMPLES", "20"))
+HEDGE_DEFAULT_MS = float(os.getenv("SEARCH_HEDGE_DEFAULT_MS", "3000"))  # until enough samples exist
+LATENCY_WINDOW = 200
+
+BROWSER_HEADERS = {
+    "User-Agent": "Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/91.0.4472.124 Safari/537.36",
+    "Accept": "text/html,application/xhtml+xml,application/xml;q=0.9,image/webp,*/*;q=0.8",
+    "Accept-Language": "en-US,en;q=0.5",
+    "Accept-Encoding": "gzip, deflate",
+    "DNT": "1",
+    "Connection": "keep-alive",
+    "Upgrade-Insecure-Requests": "1"
+}
+
+# Google wraps each organic result in one of these; matches can nest, so one result may be seen twice
+RESULT_DIV_CLASSES = ['g', 'MjjYud', 'Gx5Zad', 'tF2Cxc', 'LC20lb', 'MBeuO', 'DKV0Md']
+
+# Only Google's result containers are kept; nested matches stay inside their parent's subtree
+RESULT_STRAINER = only('div', attrs={'class': RESULT_DIV_CLASSES})
+
+
+class SearchError(Exception):
+    """Raised when a backend fails, or when every backend of a gateway has failed."""
+
+
+class SearchResponse(NamedTuple):
+    results: List[Dict]  # {"title", "link", "snippet"} per organic result, in page order
+    backend: str
+    hedged: bool
+    page_size: int  # result positions this page covers; the next page starts at start + page_size
+
+
+def pooled_session(headers=None, pool_size=10):
+    session = requests.Session()
+    if headers:
+        session.headers.update(headers)
+    session.mount("https://", HTTPAdapter(pool_connections=2, pool_maxsize=pool_size))
+    return session
+
+
+def parse_google_results(html_content, parser=None, parse_only=RESULT_STRAINER):
+    """Organic results of a Google results page, including the duplicates nested containers produce."""
+    parser = parser or default_parser()
+    if parser == "lxml":
+        document = lxml_document(html_content)
+        results = []
+        for div in document.xpath("//div[" + " or ".join(has_class(name) for name in RESULT_DIV_CLASSES) + "]"):
+            link = first(div, ".//a[@href]")
+            if link is None:
+                continue
+            title = first(div, ".//h3")
+            snippet = first(div, f".//span[{has_class('aCOpRe')}]")
+            results.append({
+                "title": text_of(title) if title is not None else None,
+                "link": link.attrib['href'],
+                "snippet": text_of(snippet) if snippet is not None else None,
+            })
+        return results
+
+    soup = parse_html(html_content, parse_only=parse_only, parser=parser)
+    if logger.isEnabledFor(logging.DEBUG):
+        # prettify() serializes the whole tree, so only pay for it when debug output is on
+        logger.debug("HTML Content Structure: %s", soup.prettify()[:1000])
+    results = []
+    for div in soup.find_all('div', {'class': RESULT_DIV_CLASSES}):
+        link = div.find('a', href=True)
+        if not link:
+            continue
+        title = div.find('h3')
+        snippet = div.find('span', class_='aCOpRe')
+        results.append({
+            "title": title.text if title else None,
+            "link": link['href'],
+            "snippet": snippet.text if snippet else None,
+        })
+    return results
+
+
+class SearchBackend(ABC):
+    """A web search provider. Subclasses implement `search`; `quota_cost` is what one call spends.
+
+    `max_page_size` is the most results one call can return; a larger `num` is cut down to it.
+    """
+
+    name = "backend"
+    quota_cost = 0
+    max_page_size = 100
+
+    def throttle(self):
+        """Block until this backend may be called again. SearchGateway runs it before starting the latency clock."""
+
+    @abstractmethod
+    def search(self, query: str, start: int = 0, num: int = 10) -> List[Dict]:
+        """Return up to `num` organic results, starting at offset `start`."""
+
+
+class SerpApiBackend(SearchBackend):
+    name = "serpapi"
+    quota_cost = 1  # SerpAPI bills every search, cached on their side or not
+
+    def __init__(self, api_key, timeout=SEARCH_TIMEOUT):
+        self.api_key = api_key
+        self.timeout = timeout
+        self.session = pooled_session()
+
+    def search(self, query, start=0, num=10):
+        params = {"q": query, "api_key": self.api_key, "num": num}
+        if start:
+            params["start"] = start
+        try:
+            response = self.session.get("https://serpapi.com/search", params=params, timeout=self.timeout)
+            response.raise_for_status()
+            data = response.json()
+        except (requests.RequestException, ValueError) as e:
+            raise SearchError(f"SerpAPI request failed: {e}")
+        if "error" in data and "organic_results" not in data:
+            # Quota exhaustion and bad keys come back as a 200 with an error message
+            raise SearchError(f"SerpAPI error: {data['error']}")
+        return [
+            {"title": result.get("title"), "link": result.get("link"), "snippet": result.get("snippet")}
+            for result in data.get("organic_results", [])
+        ]
+
+
+class GoogleHtmlBackend(SearchBackend):
+    name = "google_html"
+    max_page_size = 10  # Google's results page ignores `num`
+
+    def __init__(self, timeout=SEARCH_TIMEOUT, requests_per_minute=None):
+        self.timeout = timeout
+        self.session = pooled_session(BROWSER_HEADERS)
+        if requests_per_minute is None:
+            requests_per_minute = float(os.getenv("GOOGLE_HTML_REQUESTS_PER_MINUTE", "60"))
+        self.pacer = RateLimiter(requests_per_minute)
+
+    def throttle(self):
+        self.pacer.wait()
+
+    def fetch(self, query, start=0):
+        params = {"q": query}
+        if start:
+            params["start"] = start
+        try:
+            response = self.session.get("https://www.google.com/search", params=params, timeout=self.timeout)
+            response.raise_for_status()
+        except requests.RequestException as e:
+            raise SearchError(f"Google request failed: {e}")
+        if "/sorry/" in response.url:
+            raise SearchError("Google answered with its unusual-traffic page")
+        logger.debug("Search URL: %s", response.url)
+        return response.text
+
+    def search(self, query, start=0, num=10):
+        return parse_google_results(self.fetch(query, start))
+
+
+BACKEND_TYPES = {"serpapi": SerpApiBackend, "google_html": GoogleHtmlBackend}
+
+
+def load_backends(names, timeout=SEARCH_TIMEOUT, google_requests_per_minute=None):
+    """Build backends from a comma-separated list such as "serpapi,google_html"; the first one is primary."""
+    backends = []
+    for name in [name.strip() for name in names.split(",") if name.strip()]:
+        if name == "serpapi":
+            api_key = os.getenv("SERPAPI_KEY")
+            if not api_key:
+                logger.warning("SERPAPI_KEY is not set; leaving the serpapi backend out")
+                continue
+            backends.append(SerpApiBackend(api_key, timeout=timeout))
+        elif name == "google_html":
+            backends.append(GoogleHtmlBackend(timeout=timeout, requests_per_minute=google_requests_per_minute))
+        else:
+            raise ValueError(f"Unknown search backend {name!r}; expected one of {sorted(BACKEND_TYPES)}")
+    return backends
+
+
+class BackendStats:
+    def __init__(self):
+        self.latencies = deque(maxlen=LATENCY_WINDOW)
+        self.requests = 0
+        self.errors = 0
+        self.quota_used = 0
+        self.wins = 0
+
+    def percentile_ms(self, percentile):
+        if not self.latencies:
+            return None
+        ordered = sorted(self.latencies)
+        index = min(len(ordered) - 1, int(round(percentile / 100 * (len(ordered) - 1))))
+        return ordered[index] * 1000
+
+    def snapshot(self):
+        return {
+            "requests": self.requests,
+            "errors": self.errors,
+            "error_rate": round(self.errors / self.requests, 3) if self.requests else None,
+            "quota_used": self.quota_used,
+            "wins": self.wins,
+            "latency_ms": {
+                "p50": round(self.percentile_ms(50), 1) if self.latencies else None,
+                "p95": round(self.percentile_ms(95), 1) if self.latencies else None,
+            },
+        }
+
+
+class SearchGateway:
+    """Sends each search to the primary backend, and hedges to the next one when the primary runs slow.
+
+    The hedge fires once the primary has been outstanding for longer than its HEDGE_PERCENTILE latency;
+    whichever backend answers first wins. A backend that fails hands over to the next one straight away.
+    Time spent waiting on a backend's own rate limit counts neither towards its latency nor the hedge timer.
+    """
+
+    def __init__(self, backends: List[SearchBackend], max_workers=16):
+        if not backends:
+            raise ValueError("SearchGateway needs at least one backend")
+        self.backends = backends
+        self._executor = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix="search")
+        self._lock = threading.Lock()
+        self._stats = {backend.name: BackendStats() for backend in backends}
+        self._hedges = 0
+        self._hedge_wins = 0
+
+    def hedge_after(self, backend):
+        """Seconds to wait on `backend` before asking the next one."""
+        with self._lock:
+            return self._hedge_after_ms(backend) / 1000
+
+    def _hedge_after_ms(self, backend):
+        stats = self._stats[backend.name]
+        if len(stats.latencies) < HEDGE_MIN_SAMPLES:
+            return HEDGE_DEFAULT_MS
+        return stats.percentile_ms(HEDGE_PERCENTILE)
+
+    def search(self, query, start=0, num=10) -> SearchResponse:
+        remaining = list(self.backends)
+        pending = {}
+        errors = []
+        hedged = False
+
+        while remaining or pending:
+            if remaining and not pending:
+                backend = remaining.pop(0)
+                # Paced here, so the hedge timer below only runs while the request is really out
+                backend.throttle()
+                pending[self._executor.submit(self._call, backend, query, start, num, False)] = backend
+
+            timeout = self.hedge_after(next(iter(pending.values()))) if remaining and len(pending) == 1 else None
+            done, _ = wait(pending, timeout=timeout, return_when=FIRST_COMPLETED)
+            if not done:
+                # The primary is slower than usual: race it against the next backend
+                backend = remaining.pop(0)
+                pending[self._executor.submit(self._call, backend, query, start, num)] = backend
+                hedged = True
+                with self._lock:
+                    self._hedges += 1
+                logger.info("Hedging search to %s", backend.name)
+                continue
+
+            for future in done:
+                backend = pending.pop(future)
+                try:
+                    results = future.result()
+                except SearchError as e:
+                    errors.append(f"{backend.name}: {e}")
+                    logger.warning("Search backend %s failed: %s", backend.name, e)
+                    continue
+                with self._lock:
+                    self._stats[backend.name].wins += 1
+                    if hedged and backend is not self.backends[0]:
+                        self._hedge_wins += 1
+                return SearchResponse(results, backend.name, hedged, min(num, backend.max_page_size))
+
+        raise SearchError("All search backends failed: " + "; ".join(errors))
+
+    def _call(self, backend, query, start, num, throttle=True):
+        if throttle:
+            backend.throttle()
+        started = time.monotonic()
+        try:
+            results = backend.search(query, start, num)
+        except SearchError:
+            self._record(backend, time.monotonic() - started, failed=True)
+            raise
+        except Exception as e:
+            self._record(backend, time.monotonic() - started, failed=True)
+            raise SearchError(f"{type(e).__name__}: {e}") from e
+        self._record(backend, time.monotonic() - started, failed=False)
+        return results
+
+    def _record(self, backend, elapsed, failed):
+        with self._lock:
+            stats = self._stats[backend.name]
+            stats.requests += 1
+            stats.quota_used += backend.quota_cost
+            if failed:
+                stats.errors += 1
+            else:
+                # Failures are often instant, so only successful calls shape the hedge threshold
+                stats.latencies.append(elapsed)
+
+    def stats(self):
+        with self._lock:
+            return {
+                "backends": {name: stats.snapshot() for name, stats in self._stats.items()},
+                "hedges": self._hedges,
+                "hedge_wins": self._hedge_wins,
+                "hedge_after_ms": {backend.name: round(self._hedge_after_ms(backend), 1) for backend in self.backends},
+            }
@@ -0,0 +1,75 @@
+import os
+import threading
+import time
+
+# How long a finished call's result keeps answering identical requests; 0 only coalesces calls in flight
+MEMO_SECONDS = float(os.getenv("SINGLE_FLIGHT_MEMO_SECONDS", "5"))
+
+
+class _Call:
+    def __init__(self):
+        self.done = threading.Event()
+        self.result = None
+        self.error = None
+
+
+class SingleFlight:
+    """Coalesces concurrent calls that share a key: the first caller runs the work, the rest wait for its result.
+
+    A successful result is also handed to identical calls arriving within `memo_seconds` after it finished.
+    Errors are raised to every waiting caller but never remembered.
+    """
+
+    def __init__(self, memo_seconds: float = None):
+        self.memo_seconds = MEMO_SECONDS if memo_seconds is None else memo_seconds
+        self._lock = threading.Lock()
+        self._calls = {}
+        self._memo = {}  # key -> (expires_at, result)
+        self._leaders = 0
+        self._coalesced = 0
+        self._memo_hits = 0
+
+    def do(self, key, func, *args, **kwargs):
+        """Return (result, shared); `shared` is True when another caller's work answered this one."""
+        with self._lock:
+            now = time.monotonic()
+            self._memo = {k: memo for k, memo in self._memo.items() if memo[0] > now}
+            if key in self._memo:
+                self._memo_hits += 1
+                return self._memo[key][1], True
+            call = self._calls.get(key)
+            leader = call is None
+            if leader:
+                call = self._calls[key] = _Call()
+                self._leaders += 1
+            else:
+                self._coalesced += 1
+
+        if not leader:
+            call.done.wait()
+            if call.error is not None:
+                raise call.error
+            return call.result, True
+
+        try:
+            call.result = func(*args, **kwargs)
+        except BaseException as e:
+            call.error = e
+            raise
+        finally:
+            with self._lock:
+                del self._calls[key]
+                if call.error is None and self.memo_seconds > 0:
+                    self._memo[key] = (time.monotonic() + self.memo_seconds, call.result)
+            call.done.set()
+        return call.result, False
+
+    def stats(self):
+        with self._lock:
+            return {
+                "memo_seconds": self.memo_seconds,
+                "in_flight": len(self._calls),
+                "leaders": self._leaders,
+                "coalesced": self._coalesced,
+                "memo_hits": self._memo_hits,
+            }
@@ -0,0 +1,69 @@
+import asyncio
+import json
+import logging
+import threading
+
+from fastapi.responses import StreamingResponse
+
+from common.structured_logging import with_request_context
+
+logger = logging.getLogger(__name__)
+
+STREAM_MEDIA_TYPES = {"ndjson": "application/x-ndjson", "sse": "text/event-stream"}
+
+_DONE = object()
+
+
+def encode_stream_event(event, data, stream_format):
+    if stream_format == "sse":
+        return f"event: {event}\ndata: {json.dumps(data)}\n\n"
+    return json.dumps({"event": event, **data}) + "\n"
+
+
+async def thread_events(producer, *args):
+    """Run the blocking `producer(emit, cancel_event, *args)` in a worker thread and yield every (event, data) it emits.
+
+    An exception from the producer becomes an "error" event. `cancel_event` is set as soon as iteration stops,
+    including when the response is cancelled, so the producer can stop and hand back its browser.
+    """
+    loop = asyncio.get_running_loop()
+    queue = asyncio.Queue()
+    cancel_event = threading.Event()
+
+    def emit(event, data):
+        loop.call_soon_threadsafe(queue.put_nowait, (event, data))
+
+    def run():
+        try:
+            producer(emit, cancel_event, *args)
+        except Exception as e:
+            logger.error("Stream producer %s failed: %s", producer.__name__, e)
+            emit("error", {"detail": str(e)})
+        finally:
+            emit(_DONE, None)
+
+    threading.Thread(target=with_request_context(run), daemon=True).start()
+    try:
+        while True:
+            event, data = await queue.get()
+            if event is _DONE:
+                return
+            yield event, data
+    finally:
+        cancel_event.set()
+
+
+def stream_response(events, stream_format, raw_request=None, description="stream"):
+    """NDJSON or SSE response for an async iterator of (event, data); stops once the client disconnects."""
+    async def body():
+        try:
+            async for event, data in events:
+                if raw_request is not None and await raw_request.is_disconnected():
+                    logger.info("Client disconnected, cancelling %s", description)
+                    return
+                yield encode_stream_event(event, data, stream_format)
+        finally:
+            # Runs the producers' cleanup now rather than whenever the generator is collected
+            await events.aclose()
+
+    return StreamingResponse(body(), media_type=STREAM_MEDIA_TYPES[stream_format])
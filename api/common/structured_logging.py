@@ -0,0 +1,116 @@
+import contextvars
+import functools
+import json
+import logging
+import os
+import random
+import sys
+import uuid
+from datetime import datetime, timezone
+
+# Set per request by CorrelationIdMiddleware; "-" outside of a request (startup, background crawls)
+correlation_id = contextvars.ContextVar("correlation_id", default="-")
+
+CORRELATION_HEADER = "X-Request-ID"
+
+# Pass as extra= on debug calls inside per-item loops; LOG_SAMPLE_RATE of them are kept
+SAMPLED = {"sample_rate": float(os.getenv("LOG_SAMPLE_RATE", "0.1"))}
+
+# Attributes every LogRecord has; anything else on a record came from `extra=` and is logged as a field
+STANDARD_RECORD_ATTRS = set(vars(logging.LogRecord("", 0, "", 0, "", (), None))) | {"message", "asctime"}
+
+
+class CorrelationIdFilter(logging.Filter):
+    def filter(self, record):
+        record.correlation_id = correlation_id.get()
+        return True
+
+
+class SamplingFilter(logging.Filter):
+    """Keeps a record tagged with `extra={"sample_rate": r}` with probability r; untagged records always pass.
+
+    Meant for debug events inside hot loops, so they can stay enabled without flooding the output.
+    """
+
+    def filter(self, record):
+        rate = getattr(record, "sample_rate", None)
+        return rate is None or random.random() < rate
+
+
+class JsonFormatter(logging.Formatter):
+    """One JSON object per line. The message is only %-formatted here, i.e. once a record is really emitted."""
+
+    def __init__(self, service):
+        super().__init__()
+        self.service = service
+
+    def format(self, record):
+        entry = {
+            "ts": datetime.fromtimestamp(record.created, timezone.utc).isoformat(timespec="milliseconds"),
+            "level": record.levelname,
+            "service": self.service,
+            "logger": record.name,
+            "correlation_id": getattr(record, "correlation_id", "-"),
+            "message": record.getMessage(),
+        }
+        for key, value in vars(record).items():
+            if key not in STANDARD_RECORD_ATTRS and key not in ("correlation_id", "sample_rate"):
+                entry[key] = value
+        if record.exc_info:
+            entry["exc"] = self.formatException(record.exc_info)
+        return json.dumps(entry, default=str)
+
+
+def configure_logging(service, level=None, stream=None):
+    """Install the shared handler on the root logger.
+
+    LOG_LEVEL (default INFO) and LOG_FORMAT ("json", or "text" for local debugging) pick the output.
+    Calling it again replaces the previous handler.
+    """
+    level = level or os.getenv("LOG_LEVEL", "INFO").upper()
+    handler = logging.StreamHandler(stream or sys.stderr)
+    if os.getenv("LOG_FORMAT", "json") == "text":
+        handler.setFormatter(logging.Formatter(
+            "%(asctime)s - %(levelname)s - [%(correlation_id)s] %(name)s - %(message)s"))
+    else:
+        handler.setFormatter(JsonFormatter(service))
+    handler.addFilter(CorrelationIdFilter())
+    handler.addFilter(SamplingFilter())
+
+    root = logging.getLogger()
+    for existing in list(root.handlers):
+        root.removeHandler(existing)
+    root.addHandler(handler)
+    root.setLevel(level)
+    return handler
+
+
+def with_request_context(func):
+    """Wrap `func` so a worker thread running it logs with the caller's correlation ID."""
+    return functools.partial(contextvars.copy_context().run, func)
+
+
+class CorrelationIdMiddleware:
+    """ASGI middleware: reuse the caller's X-Request-ID or mint one, and echo it on the response."""
+
+    def __init__(self, app):
+        self.app = app
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            return await self.app(scope, receive, send)
+
+        header = CORRELATION_HEADER.lower().encode()
+        request_id = next((value.decode("latin-1") for name, value in scope["headers"] if name == header), None)
+        request_id = request_id or uuid.uuid4().hex[:16]
+        token = correlation_id.set(request_id)
+
+        async def send_with_id(message):
+            if message["type"] == "http.response.start":
+                message["headers"] = list(message.get("headers", [])) + [(header, request_id.encode("latin-1"))]
+            await send(message)
+
+        try:
+            await self.app(scope, receive, send_with_id)
+        finally:
+            correlation_id.reset(token)
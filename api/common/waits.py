@@ -0,0 +1,126 @@
+import logging
+import threading
+import time
+from contextlib import contextmanager
+
+from selenium.common.exceptions import TimeoutException
+from selenium.webdriver.support import expected_conditions as EC
+from selenium.webdriver.support.ui import WebDriverWait
+
+logger = logging.getLogger(__name__)
+
+# Upper bounds of the latency buckets, in milliseconds
+BUCKETS_MS = (50, 100, 250, 500, 1000, 2000, 5000, 10000, float("inf"))
+
+MUTATION_COUNTER_SCRIPT = """
+if (window.__scrapewareMutations === undefined) {
+    window.__scrapewareMutations = 0;
+    new MutationObserver((records) => { window.__scrapewareMutations += records.length; })
+        .observe(document, {childList: true, subtree: true, attributes: true, characterData: true});
+}
+return window.__scrapewareMutations;
+"""
+
+class WaitStats:
+    """Latency histograms of every wait, keyed by a label such as "bid_api.next_page"."""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._waits = {}
+
+    def observe(self, label, seconds, outcome="ok"):
+        elapsed_ms = seconds * 1000
+        with self._lock:
+            entry = self._waits.setdefault(label, {
+                "count": 0, "timeouts": 0, "total_ms": 0.0, "max_ms": 0.0,
+                "buckets": [0] * len(BUCKETS_MS),
+            })
+            entry["count"] += 1
+            entry["total_ms"] += elapsed_ms
+            entry["max_ms"] = max(entry["max_ms"], elapsed_ms)
+            if outcome == "timeout":
+                entry["timeouts"] += 1
+            for index, bound in enumerate(BUCKETS_MS):
+                if elapsed_ms <= bound:
+                    entry["buckets"][index] += 1
+                    break
+
+    def snapshot(self):
+        with self._lock:
+            return {
+                label: {
+                    "count": entry["count"],
+                    "timeouts": entry["timeouts"],
+                    "avg_ms": round(entry["total_ms"] / entry["count"], 1),
+                    "max_ms": round(entry["max_ms"], 1),
+                    "histogram_ms": {
+                        ("+Inf" if bound == float("inf") else f"<={bound}"): count
+                        for bound, count in zip(BUCKETS_MS, entry["buckets"])
+                    },
+                }
+                for label, entry in self._waits.items()
+            }
+
+
+wait_stats = WaitStats()
+
+
+@contextmanager
+def timed_wait(label, stats=None):
+    """Record how long the wrapped wait took, and whether it timed out, under `label`."""
+    stats = stats or wait_stats
+    started = time.monotonic()
+    try:
+        yield
+    except TimeoutException:
+        stats.observe(label, time.monotonic() - started, "timeout")
+        raise
+    stats.observe(label, time.monotonic() - started)
+
+
+def wait_for_element(driver, locator, label, timeout=10):
+    with timed_wait(label):
+        return WebDriverWait(driver, timeout).until(EC.presence_of_element_located(locator))
+
+
+def wait_for_staleness(driver, element, label, timeout=10):
+    """Wait until `element` is detached, i.e. the page or list it belonged to has been replaced."""
+    with timed_wait(label):
+        WebDriverWait(driver, timeout).until(EC.staleness_of(element))
+
+
+def wait_for_dom_quiet(driver, label, quiet_ms=300, timeout=10, poll=0.05):
+    """Wait until no DOM mutations have been observed for `quiet_ms`."""
+    with timed_wait(label):
+        _wait_until_stable(driver, MUTATION_COUNTER_SCRIPT, quiet_ms, timeout, poll, "DOM to settle")
+
+
+def wait_for_transition(driver, previous, label, timeout=10):
+    """Wait for the content `previous` belonged to to be replaced.
+
+    Uses staleness of `previous` when there is one, and DOM quiescence otherwise. A
+    transition that never happens is logged and recorded as a timeout, not raised.
+    """
+    try:
+        if previous is not None:
+            wait_for_staleness(driver, previous, label, timeout)
+        else:
+            wait_for_dom_quiet(driver, label, timeout=timeout)
+    except TimeoutException:
+        logger.warning("No page transition detected for %s within %ss", label, timeout)
+
+
+def _wait_until_stable(driver, script, stable_ms, timeout, poll, what):
+    deadline = time.monotonic() + timeout
+    last_value = None
+    stable_since = time.monotonic()
+    while time.monotonic() < deadline:
+        value = driver.execute_script(script)
+        now = time.monotonic()
+        if value != last_value:
+            last_value = value
+            stable_since = now
+        elif (now - stable_since) * 1000 >= stable_ms:
+            return
+        time.sleep(poll)
+    raise TimeoutException(f"Timed out after {timeout}s waiting for {what}")
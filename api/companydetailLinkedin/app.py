@@ -1,23 +1,48 @@
 # working company detail extractor
 import os
+import sys
 import time
 import re
+import json
+import itertools
 import logging
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from contextlib import aclosing, contextmanager
+from queue import Empty, Queue
+from typing import List, Literal, Optional
+from urllib.parse import urlparse
 from dotenv import load_dotenv
-from fastapi import FastAPI, HTTPException
-from pydantic import BaseModel
+from fastapi import FastAPI, HTTPException, Request, Response
+from pydantic import BaseModel, Field
 from selenium import webdriver
 from selenium.webdriver.chrome.service import Service
 from selenium.webdriver.chrome.options import Options
 from selenium.webdriver.common.by import By
 from selenium.webdriver.support.ui import WebDriverWait
 from selenium.webdriver.support import expected_conditions as EC
-from selenium.common.exceptions import TimeoutException, NoSuchElementException
+from selenium.common.exceptions import TimeoutException
 from fastapi.middleware.cors import CORSMiddleware
 
+# Load the service's .env first: the common modules read their settings on import, logging included
+load_dotenv(os.path.join(os.path.dirname(os.path.abspath(__file__)), ".env"))
+
+# Make api/common and this service's own modules importable whether it is started from its own folder or from api/
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+sys.path.append(os.path.dirname(os.path.abspath(__file__)))
+from common.browser_profile import load_browser_profile
+from common.disk_cache import DiskCache
+from common.driver_pool import DriverPool, PoolTimeout, reset_tabs
+from common.rate_limit import RateLimiter
+from common.single_flight import SingleFlight
+from common.streaming import stream_response, thread_events
+from common.structured_logging import CorrelationIdMiddleware, configure_logging, with_request_context
+from common.waits import timed_wait, wait_for_element, wait_stats
+from linkedin_session import LINKEDIN_HOME_URL, CookieStore, is_auth_redirect, restore_cookies
 
 # Your FastAPI app initialization
 app = FastAPI()
+app.add_middleware(CorrelationIdMiddleware)
 
 # Set up CORS for React (or any other frontend)
 origins = [
@@ -33,31 +58,78 @@ app.add_middleware(
     allow_headers=["*"],  # You can restrict specific headers if needed
 )
 # Set up logging
-logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(levelname)s - %(message)s')
+configure_logging("companydetailLinkedin")
 logger = logging.getLogger(__name__)
 
-# Load environment variables
-load_dotenv()
-
 
 LINKEDIN_USERNAME = os.getenv("LINKEDIN_USERNAME")
 LINKEDIN_PASSWORD = os.getenv("LINKEDIN_PASSWORD")
+# Several accounts spread batch load: a JSON list of {"username": ..., "password": ...}
+LINKEDIN_ACCOUNTS = os.getenv("LINKEDIN_ACCOUNTS")
+
+# Logged-in browsers are kept in a pool; cookies (or a Chrome profile) survive restarts so login is rare
+LINKEDIN_COOKIE_STORE = os.getenv(
+    "LINKEDIN_COOKIE_STORE", os.path.join(os.path.dirname(os.path.abspath(__file__)), "linkedin_cookies.json")
+)
+LINKEDIN_USER_DATA_DIR = os.getenv("LINKEDIN_USER_DATA_DIR")
+SESSION_POOL_SIZE = int(os.getenv("LINKEDIN_SESSION_POOL_SIZE", "1"))  # per account
+# Companies each account may scrape per minute, shared by every session of that account
+ACCOUNT_COMPANIES_PER_MINUTE = float(os.getenv("LINKEDIN_ACCOUNT_COMPANIES_PER_MINUTE", "10"))
+BATCH_MAX_URLS = int(os.getenv("LINKEDIN_BATCH_MAX_URLS", "5000"))
+SESSION_MAX_USES = int(os.getenv("LINKEDIN_SESSION_MAX_USES", "200"))
+SESSION_MAX_RSS_MB = int(os.getenv("LINKEDIN_SESSION_MAX_RSS_MB", "1536"))
+SESSION_ACQUIRE_TIMEOUT = float(os.getenv("LINKEDIN_SESSION_ACQUIRE_TIMEOUT", "60"))
+SESSION_CHECK_TIMEOUT = float(os.getenv("LINKEDIN_SESSION_CHECK_TIMEOUT", "10"))
+
+# One wait for the about section to render; fields still missing after it are simply absent
+ABOUT_READY_TIMEOUT = float(os.getenv("LINKEDIN_ABOUT_READY_TIMEOUT", "10"))
+
+# The posts feed is scrolled until max_posts are found, no new post loads within the idle timeout, or the limit hits
+DEFAULT_MAX_POSTS = int(os.getenv("LINKEDIN_DEFAULT_MAX_POSTS", "2"))
+MAX_POSTS_LIMIT = int(os.getenv("LINKEDIN_MAX_POSTS_LIMIT", "100"))
+POSTS_SCROLL_IDLE_TIMEOUT = float(os.getenv("LINKEDIN_POSTS_SCROLL_IDLE_TIMEOUT", "5"))
+POSTS_TIME_LIMIT = float(os.getenv("LINKEDIN_POSTS_TIME_LIMIT", "60"))
+
+# Scraped companies are cached; past their TTL the about fields or posts are still served, then refreshed
+COMPANY_CACHE_PATH = os.getenv(
+    "LINKEDIN_COMPANY_CACHE_PATH", os.path.join(os.path.dirname(os.path.abspath(__file__)), "company_cache.sqlite3")
+)
+COMPANY_ABOUT_TTL = int(os.getenv("LINKEDIN_COMPANY_ABOUT_TTL", str(7 * 24 * 3600)))
+COMPANY_POSTS_TTL = int(os.getenv("LINKEDIN_COMPANY_POSTS_TTL", str(24 * 3600)))
+COMPANY_CACHE_MAX_AGE = int(os.getenv("LINKEDIN_COMPANY_CACHE_MAX_AGE", str(30 * 24 * 3600)))  # never served after this
+COMPANY_CACHE_MAX_ENTRIES = int(os.getenv("LINKEDIN_COMPANY_CACHE_MAX_ENTRIES", "50000"))
+COMPANY_REFRESH_WORKERS = int(os.getenv("LINKEDIN_COMPANY_REFRESH_WORKERS", "1"))
 
 class CompanyRequest(BaseModel):
     company_url: str
+    use_cache: bool = True  # False always scrapes live, then refreshes the cached copy
+    debug: bool = False  # Adds cache status and per-stage timings to the response
+    max_posts: int = Field(DEFAULT_MAX_POSTS, ge=0, le=MAX_POSTS_LIMIT)
+
+class BatchCompanyRequest(BaseModel):
+    company_urls: List[str]
+    use_cache: bool = True
+    debug: bool = False
+    max_posts: int = Field(DEFAULT_MAX_POSTS, ge=0, le=MAX_POSTS_LIMIT)
+
+class PrewarmRequest(BaseModel):
+    company_urls: List[str]
+    force: bool = False  # Refresh every URL, not just those missing or past their TTL
 
 class CompanyData(BaseModel):
-    overview: str = None
-    website: str = None
-    phone: str = None
-    industry: str = None
-    company_size: str = None
-    headquarters: str = None
-    founded: str = None
-    specialties: str = None
+    overview: Optional[str] = None
+    website: Optional[str] = None
+    phone: Optional[str] = None
+    industry: Optional[str] = None
+    company_size: Optional[str] = None
+    headquarters: Optional[str] = None
+    founded: Optional[str] = None
+    specialties: Optional[str] = None
     top_posts: list[str] = []
 
-def setup_selenium():
+browser_profile = load_browser_profile()
+
+def setup_selenium(user_data_dir=None):
     chrome_options = Options()
     chrome_options.add_argument("--headless")
     chrome_options.add_argument("--no-sandbox")
@@ -67,139 +139,630 @@ def setup_selenium():
     chrome_options.add_argument("user-agent=Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/91.0.4472.124 Safari/537.36")
     chrome_options.add_argument("--accept-lang=en-US,en;q=0.9")
     chrome_options.add_argument("--accept-encoding=gzip, deflate, br")
-    
+    # The posts tab loads in the background while the about tab is read; keep Chrome from throttling it
+    chrome_options.add_argument("--disable-renderer-backgrounding")
+    chrome_options.add_argument("--disable-backgrounding-occluded-windows")
+    if user_data_dir:
+        chrome_options.add_argument(f"--user-data-dir={user_data_dir}")
+    browser_profile.apply_options(chrome_options)
+
     service = Service()
     driver = webdriver.Chrome(service=service, options=chrome_options)
-    return driver
+    return browser_profile.apply_driver(driver)
 
-def login_to_linkedin(driver):
+def login_to_linkedin(driver, username, password):
     logger.info("Logging in to LinkedIn...")
     driver.get("https://www.linkedin.com/login")
-    time.sleep(2)  # Wait for page to load
+    wait_for_element(driver, (By.ID, "username"), "linkedin.login_form")
 
     # Fill in username and password
     username_field = driver.find_element(By.ID, "username")
     password_field = driver.find_element(By.ID, "password")
     
-    username_field.send_keys(LINKEDIN_USERNAME)
-    password_field.send_keys(LINKEDIN_PASSWORD)
+    username_field.send_keys(username)
+    password_field.send_keys(password)
 
     # Click login button
     login_button = driver.find_element(By.CSS_SELECTOR, "button[type='submit']")
     login_button.click()
 
     # Wait for login to complete
-    WebDriverWait(driver, 10).until(
-        EC.presence_of_element_located((By.ID, "global-nav"))
-    )
+    wait_for_element(driver, (By.ID, "global-nav"), "linkedin.login_complete")
     logger.info("Successfully logged in to LinkedIn")
 
-def safe_extract(driver, selector, attribute=None, by=By.CSS_SELECTOR):
+session_stats = {"restored": 0, "logins": 0, "expired": 0}
+session_stats_lock = threading.Lock()
+
+def record_session_event(event):
+    with session_stats_lock:
+        session_stats[event] += 1
+
+def session_is_active(driver):
+    driver.get(LINKEDIN_HOME_URL)
+    if is_auth_redirect(driver.current_url):
+        return False
     try:
-        wait = WebDriverWait(driver, 10)
-        element = wait.until(EC.presence_of_element_located((by, selector)))
-        value = element.get_attribute(attribute) if attribute else element.text.strip()
-        logger.info(f"Successfully extracted {selector}: {value}")
-        return value
+        wait_for_element(driver, (By.ID, "global-nav"), "linkedin.session_check", timeout=SESSION_CHECK_TIMEOUT)
+        return True
     except TimeoutException:
-        logger.warning(f"Timeout while extracting {selector}")
-    except NoSuchElementException:
-        logger.warning(f"Element not found: {selector}")
-    except Exception as e:
-        logger.error(f"Error extracting {selector}: {str(e)}")
-    return None
+        return False
 
-def scrape_about_page(driver, url):
-    logger.info(f"Scraping about page: {url}/about/")
-    driver.get(url + "/about/")
-    
-    company_data = CompanyData()
+class LinkedInAccount:
+    """One LinkedIn login: its saved cookies, its pool of logged-in browsers and its rate limit."""
 
-    company_data.overview = safe_extract(driver, "p.break-words")
-    company_data.website = safe_extract(driver, "a[href^='http']:not([href*='linkedin.com'])", "href")
-    
-    # Updated phone extraction
-    phone_selector = "a[href^='tel:']"
-    phone_href = safe_extract(driver, phone_selector, "href")
-    if phone_href:
-        company_data.phone = phone_href.replace("tel:", "")
-
-    # Use JavaScript to extract fields
-    logger.info("Extracting fields using JavaScript...")
-    script = """
-    const extractField = (text) => {
-        const element = Array.from(document.querySelectorAll('dt')).find(el => el.textContent.trim().includes(text));
-        return element ? element.nextElementSibling.textContent.trim() : null;
-    };
-    const extractPhone = () => {
-        const phoneLink = document.querySelector('a[href^="tel:"]');
-        return phoneLink ? phoneLink.getAttribute('href').replace('tel:', '') : null;
-    };
-    return {
-        industry: extractField('Industry'),
-        company_size: extractField('Company size'),
-        headquarters: extractField('Headquarters'),
-        founded: extractField('Founded'),
-        specialties: extractField('Specialties'),
-        phone: extractPhone()
-    };
+    def __init__(self, username, password, cookie_path, user_data_dir=None):
+        self.username = username
+        self.password = password
+        self.cookie_store = CookieStore(cookie_path)
+        self.user_data_dir = user_data_dir
+        self.rate_limiter = RateLimiter(ACCOUNT_COMPANIES_PER_MINUTE)
+        self._profile_slots = set()  # session-<n> profile directories held by a running browser
+        self._profile_lock = threading.Lock()
+        # Tabs are closed between requests but cookies stay, so borrowers get an authenticated browser
+        self.pool = DriverPool(
+            self.start_session,
+            size=SESSION_POOL_SIZE,
+            max_uses=SESSION_MAX_USES,
+            max_rss_mb=SESSION_MAX_RSS_MB,
+            acquire_timeout=SESSION_ACQUIRE_TIMEOUT,
+            reset=reset_tabs,
+            name=f"LinkedIn session ({username})",
+            on_quit=self.release_profile,
+        )
+
+    def login_and_save(self, driver):
+        login_to_linkedin(driver, self.username, self.password)
+        record_session_event("logins")
+        try:
+            self.cookie_store.save(driver.get_cookies())
+        except OSError as e:
+            logger.warning("Could not save LinkedIn cookies: %s", e)
+
+    def claim_profile(self):
+        """Lowest profile slot no running browser holds."""
+        # Chrome locks a profile directory, so every running browser needs its own; reusing the same
+        # few names means a recycled session's replacement picks up its directory instead of leaving it behind
+        with self._profile_lock:
+            slot = next(n for n in itertools.count(1) if n not in self._profile_slots)
+            self._profile_slots.add(slot)
+            return slot
+
+    def release_profile(self, driver):
+        with self._profile_lock:
+            self._profile_slots.discard(getattr(driver, "profile_slot", None))
+
+    def start_session(self):
+        """Pool factory: a logged-in browser, reusing saved cookies or the Chrome profile when they still work."""
+        slot = user_data_dir = None
+        if self.user_data_dir:
+            slot = self.claim_profile()
+            user_data_dir = os.path.join(self.user_data_dir, f"session-{slot}")
+        try:
+            driver = setup_selenium(user_data_dir)
+        except Exception:
+            with self._profile_lock:
+                self._profile_slots.discard(slot)
+            raise
+        driver.profile_slot = slot
+        # Lets open_authenticated log the right account back in
+        driver.linkedin_account = self
+        try:
+            restore_cookies(driver, self.cookie_store.load())
+            if session_is_active(driver):
+                record_session_event("restored")
+                logger.info("Reusing saved LinkedIn session for %s", self.username)
+            else:
+                self.login_and_save(driver)
+        except Exception:
+            driver.quit()
+            self.release_profile(driver)
+            raise
+        return driver
+
+    def load(self):
+        stats = self.pool.stats()
+        return (stats["in_use"] + stats["waiting"]) / self.pool.size
+
+    def stats(self):
+        return {"username": self.username, "pool": self.pool.stats(), "rate_limit": self.rate_limiter.stats()}
+
+def load_accounts():
+    credentials = json.loads(LINKEDIN_ACCOUNTS) if LINKEDIN_ACCOUNTS else [
+        {"username": LINKEDIN_USERNAME, "password": LINKEDIN_PASSWORD}
+    ]
+    accounts = []
+    for credential in credentials:
+        cookie_path, user_data_dir = LINKEDIN_COOKIE_STORE, LINKEDIN_USER_DATA_DIR
+        if len(credentials) > 1:
+            # Every account keeps its own cookies and Chrome profiles
+            slug = re.sub(r'\W+', '_', credential["username"])
+            root, ext = os.path.splitext(LINKEDIN_COOKIE_STORE)
+            cookie_path = f"{root}-{slug}{ext}"
+            user_data_dir = user_data_dir and os.path.join(user_data_dir, slug)
+        accounts.append(LinkedInAccount(credential["username"], credential["password"], cookie_path, user_data_dir))
+    return accounts
+
+accounts = load_accounts()
+
+class ScrapeCancelled(Exception):
+    """Raised when a batch is cancelled before its next company starts."""
+
+@contextmanager
+def borrow_session(cancel_event=None):
+    """Borrow a logged-in browser from the least busy account, once that account's rate limit allows."""
+    account = min(accounts, key=lambda candidate: candidate.load())
+    with account.pool.borrow() as driver:
+        account.rate_limiter.wait(cancel_event)
+        if cancel_event is not None and cancel_event.is_set():
+            raise ScrapeCancelled("Cancelled while waiting for the account's rate limit")
+        yield driver
+
+def open_authenticated(driver, url):
+    """Load a LinkedIn page, logging in again first if the session turns out to have expired."""
+    driver.get(url)
+    if is_auth_redirect(driver.current_url):
+        logger.info("LinkedIn session expired, logging in again")
+        record_session_event("expired")
+        driver.linkedin_account.login_and_save(driver)
+        driver.get(url)
+
+@app.on_event("startup")
+def start_session_pools():
+    for account in accounts:
+        account.pool.start()
+
+@app.on_event("shutdown")
+def close_session_pools():
+    for account in accounts:
+        account.pool.close()
+
+# True once the about section has rendered: the overview paragraph or the dt/dd details list
+ABOUT_READY_SCRIPT = "return !!document.querySelector('p.break-words, dl dt');"
+
+# Reads every about-page field in one round-trip
+ABOUT_FIELDS_SCRIPT = """
+const text = (el) => el ? el.innerText.trim() : null;
+const details = {};
+document.querySelectorAll('dt').forEach(dt => {
+    const dd = dt.nextElementSibling;
+    if (dd) details[dt.textContent.trim()] = dd.textContent.trim();
+});
+const extractField = (label) => {
+    const key = Object.keys(details).find(name => name.includes(label));
+    return key ? details[key] : null;
+};
+const website = document.querySelector("a[href^='http']:not([href*='linkedin.com'])");
+const phone = document.querySelector('a[href^="tel:"]');
+return {
+    overview: text(document.querySelector('p.break-words')),
+    website: website ? website.getAttribute('href') : null,
+    phone: phone ? phone.getAttribute('href').replace('tel:', '') : null,
+    industry: extractField('Industry'),
+    company_size: extractField('Company size'),
+    headquarters: extractField('Headquarters'),
+    founded: extractField('Founded'),
+    specialties: extractField('Specialties')
+};
+"""
+
+def scrape_about_page(driver, url, timings=None):
+    """Load the about page, wait once for it to render, then read every field with a single script.
+
+    Worst case is the navigation plus ABOUT_READY_TIMEOUT. `timings` (if given) receives the
+    navigation, readiness-wait and extraction durations in milliseconds.
     """
-    result = driver.execute_script(script)
-    for field, value in result.items():
-        if not getattr(company_data, field):
-            if field == "company_size" and value:
-                match = re.search(r'\d+(?:-\d+)?\s*\w+', value)
-                value = match.group() if match else value
-            setattr(company_data, field, value)
-            logger.info(f"Extracted {field}: {value}")
+    timings = {} if timings is None else timings
+    logger.info("Scraping about page: %s/about/", url)
+    started = time.monotonic()
+    open_authenticated(driver, url + "/about/")
+    loaded = time.monotonic()
 
+    try:
+        with timed_wait("linkedin.about_ready"):
+            WebDriverWait(driver, ABOUT_READY_TIMEOUT).until(lambda d: d.execute_script(ABOUT_READY_SCRIPT))
+    except TimeoutException:
+        logger.warning("About page not ready after %.0fs, extracting what rendered", ABOUT_READY_TIMEOUT)
+    ready = time.monotonic()
+
+    result = driver.execute_script(ABOUT_FIELDS_SCRIPT)
+    if result.get("company_size"):
+        match = re.search(r'\d+(?:-\d+)?\s*\w+', result["company_size"])
+        result["company_size"] = match.group() if match else result["company_size"]
+    company_data = CompanyData(**result)
+    finished = time.monotonic()
+
+    timings["about_navigation_ms"] = round((loaded - started) * 1000, 1)
+    timings["about_ready_ms"] = round((ready - loaded) * 1000, 1)
+    timings["about_extract_ms"] = round((finished - ready) * 1000, 1)
+    timings["about_ms"] = round((finished - started) * 1000, 1)
+    logger.info("Extracted about fields in %.0f ms: %s", timings['about_ms'], result)
     return company_data
 
-def scrape_posts(driver, url):
-    logger.info(f"Scraping posts: {url}/posts/?feedView=all")
-    driver.get(url + "/posts/?feedView=all")
-    wait = WebDriverWait(driver, 10)
+POST_SELECTOR = "div.feed-shared-update-v2__description-wrapper"
+
+# Reads up to arguments[1] posts not returned before and marks them, so each scroll only touches new elements
+NEW_POSTS_SCRIPT = """
+const posts = Array.from(document.querySelectorAll(arguments[0] + ':not([data-scrapeware-seen])'));
+return posts.slice(0, arguments[1]).map(post => {
+    post.setAttribute('data-scrapeware-seen', '1');
+    const text = post.querySelector('span.break-words');
+    return text ? text.innerText : null;
+});
+"""
+COUNT_NEW_POSTS_SCRIPT = "return document.querySelectorAll(arguments[0] + ':not([data-scrapeware-seen])').length;"
+SCROLL_TO_BOTTOM_SCRIPT = "window.scrollTo(0, document.body.scrollHeight);"
+
+def iter_posts(driver, url, max_posts=DEFAULT_MAX_POSTS, navigate=True, cancel_event=None):
+    """Yield post texts as they appear, scrolling the feed for more until `max_posts` are found.
+
+    Stops early when a scroll brings no new post within POSTS_SCROLL_IDLE_TIMEOUT, or after POSTS_TIME_LIMIT.
+    """
+    if max_posts <= 0:
+        return
+    posts_url = url + "/posts/?feedView=all"
+    logger.info("Scraping posts: %s", posts_url)
+    if navigate or is_auth_redirect(driver.current_url):
+        open_authenticated(driver, posts_url)
+
+    try:
+        with timed_wait("linkedin.posts"):
+            WebDriverWait(driver, 10).until(EC.presence_of_element_located((By.CSS_SELECTOR, POST_SELECTOR)))
+    except TimeoutException:
+        logger.warning("No posts rendered for %s", url)
+        return
+
+    found = 0
+    deadline = time.monotonic() + POSTS_TIME_LIMIT
+    while True:
+        for text in driver.execute_script(NEW_POSTS_SCRIPT, POST_SELECTOR, max_posts - found):
+            if text is None:
+                logger.warning("Skipping post without text")
+                continue
+            found += 1
+            logger.info("Extracted post %s: %s...", found, text[:50])
+            yield text
+
+        remaining = deadline - time.monotonic()
+        if found >= max_posts or remaining <= 0 or (cancel_event is not None and cancel_event.is_set()):
+            return
+        driver.execute_script(SCROLL_TO_BOTTOM_SCRIPT)
+        try:
+            with timed_wait("linkedin.posts_scroll"):
+                WebDriverWait(driver, min(POSTS_SCROLL_IDLE_TIMEOUT, remaining)).until(
+                    lambda d: d.execute_script(COUNT_NEW_POSTS_SCRIPT, POST_SELECTOR)
+                )
+        except TimeoutException:
+            logger.info("No new posts after scrolling, stopping at %s of %s", found, max_posts)
+            return
 
+def scrape_posts(driver, url, navigate=True, max_posts=DEFAULT_MAX_POSTS, on_post=None, cancel_event=None):
     posts = []
     try:
-        post_selector = "div.feed-shared-update-v2__description-wrapper"
-        post_elements = wait.until(EC.presence_of_all_elements_located((By.CSS_SELECTOR, post_selector)))
-        
-        for i, post in enumerate(post_elements[:2]):
-            try:
-                text = post.find_element(By.CSS_SELECTOR, "span.break-words").text
-                posts.append(text)
-                logger.info(f"Extracted post {i+1}: {text[:50]}...")
-            except Exception as e:
-                logger.error(f"Error extracting post {i+1} text: {str(e)}")
+        for text in iter_posts(driver, url, max_posts, navigate, cancel_event):
+            posts.append(text)
+            if on_post is not None:
+                on_post(len(posts), text)
     except Exception as e:
-        logger.error(f"Error scraping posts: {str(e)}")
+        logger.error("Error scraping posts: %s", e)
 
     return posts
 
-@app.post("/scrape-company/")
-async def scrape_company(request: CompanyRequest):
-    driver = setup_selenium()
+def scrape_company_details(driver, company_url, timings, max_posts=DEFAULT_MAX_POSTS, on_post=None, cancel_event=None):
+    """Scrape the about page and the posts feed with both pages loading at the same time.
+
+    WebDriver runs one command at a time per browser, so the overlap comes from the page loads:
+    the posts feed starts loading in a second tab while the about tab is navigated and read.
+    """
+    started = time.monotonic()
+    about_tab = driver.current_window_handle
+    known_tabs = set(driver.window_handles)
+    # chromedriver disables the popup blocker, so window.open returns at once with an empty tab
+    driver.execute_script("window.open('about:blank', '_blank');")
+    posts_tab = next(handle for handle in driver.window_handles if handle not in known_tabs)
 
     try:
-        login_to_linkedin(driver)
-        
-        logger.info("Starting to scrape about page...")
-        start_time = time.time()
-        company_data = scrape_about_page(driver, request.company_url)
-        logger.info(f"Finished scraping about page in {time.time() - start_time:.2f} seconds")
-
-        logger.info("Starting to scrape posts...")
-        start_time = time.time()
-        company_data.top_posts = scrape_posts(driver, request.company_url)
-        logger.info(f"Finished scraping posts in {time.time() - start_time:.2f} seconds")
-
-        return company_data
+        # CDP URL blocking is per tab, so the new tab needs the lean profile too before its page starts loading
+        driver.switch_to.window(posts_tab)
+        browser_profile.apply_driver(driver)
+        # Navigate from a timer so the script returns before the load starts and the feed loads in the background
+        driver.execute_script("const url = arguments[0]; setTimeout(() => { window.location.href = url; }, 0);",
+                              company_url + "/posts/?feedView=all")
+        driver.switch_to.window(about_tab)
+
+        company_data = scrape_about_page(driver, company_url, timings)
+        about_done = time.monotonic()
+
+        driver.switch_to.window(posts_tab)
+        company_data.top_posts = scrape_posts(driver, company_url, False, max_posts, on_post, cancel_event)
+        posts_done = time.monotonic()
+    finally:
+        if posts_tab in driver.window_handles:
+            driver.switch_to.window(posts_tab)
+            driver.close()
+        driver.switch_to.window(about_tab)
+
+    timings["posts_after_about_ms"] = round((posts_done - about_done) * 1000, 1)
+    timings["scrape_ms"] = round((posts_done - started) * 1000, 1)
+    logger.info("Scraped %s in %.0f ms (about %.0f ms, posts ready %.0f ms later)",
+                company_url, timings['scrape_ms'], timings['about_ms'], timings['posts_after_about_ms'])
+    return company_data
+
+company_cache = DiskCache(COMPANY_CACHE_PATH, ttl=COMPANY_CACHE_MAX_AGE, max_entries=COMPANY_CACHE_MAX_ENTRIES)
+refresh_executor = ThreadPoolExecutor(max_workers=COMPANY_REFRESH_WORKERS, thread_name_prefix="company-refresh")
+refreshing = set()
+cache_stats = {"served_fresh": 0, "served_stale": 0, "scraped_live": 0, "refreshes": 0, "refresh_failures": 0}
+cache_stats_lock = threading.Lock()
+
+def record_cache_event(event):
+    with cache_stats_lock:
+        cache_stats[event] += 1
+
+# Page types that have the about page and posts feed the scraper reads
+COMPANY_PAGE_KINDS = ("company", "school", "showcase")
+
+class InvalidCompanyUrl(ValueError):
+    """Raised for a URL that is not a LinkedIn company page."""
+
+def normalize_company_url(company_url):
+    """https://www.linkedin.com/company/<slug> for any spelling of a company page URL."""
+    url = company_url.strip()
+    if "://" not in url:
+        # "linkedin.com/company/foo" would otherwise parse as a path with no host
+        url = "https://" + url
+    parsed = urlparse(url)
+    host = (parsed.hostname or "").lower()
+    parts = [part for part in parsed.path.lower().split("/") if part]
+    if parsed.scheme.lower() not in ("http", "https") \
+            or (host != "linkedin.com" and not host.endswith(".linkedin.com")) \
+            or len(parts) < 2 or parts[0] not in COMPANY_PAGE_KINDS:
+        raise InvalidCompanyUrl(f"Not a LinkedIn company page URL: {company_url!r}")
+    # Sub-pages such as /about or /posts all belong to the same company
+    return f"https://www.linkedin.com/{parts[0]}/{parts[1]}"
+
+def require_company_url(company_url):
+    try:
+        return normalize_company_url(company_url)
+    except InvalidCompanyUrl as e:
+        raise HTTPException(status_code=400, detail=str(e))
+
+def stale_parts(entry, now=None):
+    now = now or time.time()
+    parts = set()
+    if now - entry["about_scraped_at"] > COMPANY_ABOUT_TTL:
+        parts.add("about")
+    if now - entry["posts_scraped_at"] > COMPANY_POSTS_TTL:
+        parts.add("posts")
+    return parts
+
+def store_company(company_url, company_data, max_posts):
+    now = time.time()
+    company_cache.set(company_url, {
+        "about": company_data.model_dump(exclude={"top_posts"}),
+        "about_scraped_at": now,
+        "top_posts": company_data.top_posts,
+        "posts_scraped_at": now,
+        "posts_depth": max_posts,  # How many posts were asked for, so deeper requests know to scrape again
+    })
+
+def refresh_company(company_url, parts, entry, max_posts=DEFAULT_MAX_POSTS):
+    """Re-scrape the stale `parts` ("about", "posts") of a cached company; a missing entry gets both."""
+    try:
+        with borrow_session() as driver:
+            if entry is None:
+                store_company(company_url, scrape_company_details(driver, company_url, {}, max_posts), max_posts)
+            else:
+                now = time.time()
+                if "about" in parts:
+                    entry["about"] = scrape_about_page(driver, company_url).model_dump(exclude={"top_posts"})
+                    entry["about_scraped_at"] = now
+                if "posts" in parts:
+                    entry["top_posts"] = scrape_posts(driver, company_url, max_posts=posts_depth(entry))
+                    entry["posts_scraped_at"] = now
+                company_cache.set(company_url, entry)
+        record_cache_event("refreshes")
     except Exception as e:
-        logger.error(f"Error during scraping: {str(e)}")
-        raise HTTPException(status_code=500, detail=str(e))
+        record_cache_event("refresh_failures")
+        logger.error("Background refresh of %s failed: %s", company_url, e)
     finally:
-        driver.quit()
+        with cache_stats_lock:
+            refreshing.discard(company_url)
+
+def posts_depth(entry):
+    return entry.get("posts_depth", DEFAULT_MAX_POSTS)
+
+def schedule_refresh(company_url, parts, entry, max_posts=DEFAULT_MAX_POSTS):
+    """Queue a background refresh unless one is already pending for this company."""
+    with cache_stats_lock:
+        if company_url in refreshing:
+            return False
+        refreshing.add(company_url)
+    refresh_executor.submit(with_request_context(refresh_company), company_url, parts, entry, max_posts)
+    return True
+
+def fetch_company(company_url, timings, use_cache=True, cancel_event=None, max_posts=DEFAULT_MAX_POSTS, on_post=None):
+    """Return (CompanyData, cache status). Stale cache entries are returned at once and refreshed behind.
+
+    `on_post(number, text)` is called for every post, as it is scraped or read from the cache.
+    """
+    company_url = normalize_company_url(company_url)
+    entry = company_cache.get(company_url) if use_cache else None
+    # An entry scraped for fewer posts than requested can't answer this request
+    if entry is not None and posts_depth(entry) >= max_posts:
+        top_posts = entry["top_posts"][:max_posts]
+        company_data = CompanyData(**entry["about"], top_posts=top_posts)
+        parts = stale_parts(entry)
+        if parts:
+            schedule_refresh(company_url, parts, entry)
+        status = "stale" if parts else "fresh"
+        record_cache_event(f"served_{status}")
+        if on_post is not None:
+            for number, text in enumerate(top_posts, 1):
+                on_post(number, text)
+        return company_data, status
+
+    record_cache_event("scraped_live")
+    with borrow_session(cancel_event) as driver:
+        company_data = scrape_company_details(driver, company_url, timings, max_posts, on_post, cancel_event)
+    store_company(company_url, company_data, max_posts)
+    return company_data, "miss"
+
+# Requests for the same company at the same moment share one scrape (and one session)
+company_flights = SingleFlight()
+
+def fetch_company_shared(company_url, use_cache=True, max_posts=DEFAULT_MAX_POSTS):
+    """fetch_company, coalesced with identical concurrent requests. Returns (CompanyData, cache status, timings, shared)."""
+    def fetch():
+        timings = {}
+        company_data, cache_status = fetch_company(company_url, timings, use_cache, max_posts=max_posts)
+        return company_data, cache_status, timings
+
+    key = f"{normalize_company_url(company_url)}|{max_posts}|{int(use_cache)}"
+    (company_data, cache_status, timings), shared = company_flights.do(key, fetch)
+    return company_data, cache_status, dict(timings), shared
+
+@app.on_event("shutdown")
+def stop_refresh_executor():
+    refresh_executor.shutdown(wait=False, cancel_futures=True)
+
+def server_timing(timings):
+    return ", ".join(f"{name.removesuffix('_ms')};dur={duration}" for name, duration in timings.items())
+
+@app.post("/scrape-company/")
+def scrape_company(request: CompanyRequest, response: Response):
+    # Plain def: FastAPI runs it in the threadpool, so concurrent requests can each hold a pooled session
+    require_company_url(request.company_url)
+    started = time.monotonic()
+    try:
+        company_data, cache_status, timings, shared = fetch_company_shared(request.company_url, request.use_cache,
+                                                                           request.max_posts)
+        timings["total_ms"] = round((time.monotonic() - started) * 1000, 1)
+
+        # Per-request stage latencies, visible in browser dev tools and to API clients
+        response.headers["Server-Timing"] = server_timing(timings)
+        response.headers["X-Cache"] = cache_status
+        result = company_data.model_dump()
+        if request.debug:
+            result["debug"] = {"cache": cache_status, "shared": shared, "timings": timings}
+        return result
+    except PoolTimeout as e:
+        logger.error("Session pool exhausted: %s", e)
+        raise HTTPException(status_code=503, detail=str(e))
+    except Exception as e:
+        logger.error("Error during scraping: %s", e)
+        raise HTTPException(status_code=500, detail=str(e))
+
+def produce_company_stream(emit, cancel_event, request):
+    """Scrape one company in a worker thread, emitting each post as it is found and then the full company."""
+    def on_post(number, text):
+        emit("post", {"number": number, "text": text})
+
+    timings = {}
+    company_data, cache_status = fetch_company(request.company_url, timings, request.use_cache, cancel_event,
+                                               request.max_posts, on_post)
+    payload = {"cache": cache_status, "data": company_data.model_dump()}
+    if request.debug:
+        payload["timings"] = timings
+    emit("company", payload)
+
+@app.post("/scrape-company/stream")
+async def stream_company(request: CompanyRequest, raw_request: Request, format: Literal["ndjson", "sse"] = "ndjson"):
+    """Like /scrape-company/, but streams a post event per post as the feed is scrolled, then the full company."""
+    require_company_url(request.company_url)
+
+    async def events():
+        produced = thread_events(produce_company_stream, request)
+        async with aclosing(produced):
+            async for event in produced:
+                yield event
+        yield "done", {}
+
+    return stream_response(events(), format, raw_request, f"scrape of {request.company_url}")
+
+def scrape_batch_worker(emit, cancel_event, jobs, use_cache, debug, max_posts):
+    """Take URLs off `jobs` until it is empty; every URL yields exactly one result or error event."""
+    while not cancel_event.is_set():
+        try:
+            index, company_url = jobs.get_nowait()
+        except Empty:
+            return
+        try:
+            timings = {}
+            company_data, cache_status = fetch_company(company_url, timings, use_cache, cancel_event, max_posts)
+            data = {"index": index, "company_url": company_url, "cache": cache_status, "data": company_data.model_dump()}
+            if debug:
+                data["timings"] = timings
+            emit("company", data)
+        except Exception as e:
+            logger.error("Error scraping %s: %s", company_url, e)
+            emit("error", {"index": index, "company_url": company_url, "detail": str(e)})
+
+def produce_batch(emit, cancel_event, company_urls, use_cache, debug, max_posts):
+    jobs = Queue()
+    for job in enumerate(company_urls):
+        jobs.put(job)
+
+    # One worker per pooled session; the pools and rate limiters decide the actual pace
+    worker_count = min(len(company_urls), sum(account.pool.size for account in accounts))
+    workers = [
+        threading.Thread(
+            target=with_request_context(scrape_batch_worker),
+            args=(emit, cancel_event, jobs, use_cache, debug, max_posts),
+            daemon=True,
+        )
+        for _ in range(worker_count)
+    ]
+    for worker in workers:
+        worker.start()
+    for worker in workers:
+        worker.join()
+
+@app.post("/scrape-companies/")
+async def scrape_companies(request: BatchCompanyRequest, raw_request: Request, format: Literal["ndjson", "sse"] = "ndjson"):
+    """Scrape many companies across every account's sessions, streaming each result as it completes."""
+    company_urls = list(dict.fromkeys(request.company_urls))
+    if not company_urls or len(company_urls) > BATCH_MAX_URLS:
+        raise HTTPException(status_code=400, detail=f"company_urls must hold between 1 and {BATCH_MAX_URLS} URLs")
+    for company_url in company_urls:
+        require_company_url(company_url)
+    logger.info("Starting batch of %s companies", len(company_urls))
+
+    async def events():
+        counts = {"company": 0, "error": 0}
+        produced = thread_events(produce_batch, company_urls, request.use_cache, request.debug, request.max_posts)
+        async with aclosing(produced):
+            async for kind, data in produced:
+                counts[kind] += 1
+                yield kind, data
+        yield "done", {"companies": counts["company"], "failed": counts["error"]}
+
+    return stream_response(events(), format, raw_request, "company batch")
+
+@app.post("/company-cache/prewarm")
+def prewarm_company_cache(request: PrewarmRequest):
+    """Queue background scrapes for companies that are missing from the cache or past their TTL."""
+    queued = fresh = 0
+    for company_url in dict.fromkeys(require_company_url(url) for url in request.company_urls):
+        entry = company_cache.get(company_url)
+        parts = {"about", "posts"} if request.force or entry is None else stale_parts(entry)
+        if not parts:
+            fresh += 1
+        elif schedule_refresh(company_url, parts, entry, posts_depth(entry) if entry else DEFAULT_MAX_POSTS):
+            queued += 1
+    return {"queued": queued, "fresh": fresh}
+
+@app.get("/stats")
+def get_stats():
+    with session_stats_lock:
+        sessions = dict(session_stats)
+    with cache_stats_lock:
+        company_cache_stats = {**cache_stats, "refreshing": len(refreshing)}
+    return {
+        "accounts": [account.stats() for account in accounts],
+        "sessions": sessions,
+        "company_cache": {**company_cache.stats(), **company_cache_stats},
+        "waits": wait_stats.snapshot(),
+        "single_flight": company_flights.stats(),
+    }
 
 if __name__ == "__main__":
     import uvicorn
@@ -0,0 +1,79 @@
+import json
+import logging
+import os
+import threading
+from typing import Dict, List
+
+from selenium.common.exceptions import WebDriverException
+
+logger = logging.getLogger(__name__)
+
+LINKEDIN_HOME_URL = "https://www.linkedin.com/feed/"
+
+# Where LinkedIn sends a browser whose session is missing or has expired
+AUTH_REDIRECT_MARKERS = ("/login", "/authwall", "/checkpoint", "/uas/login", "/signup")
+
+# Fields Network.setCookies accepts, mapped from the names WebDriver's get_cookies() returns
+CDP_COOKIE_FIELDS = {"name": "name", "value": "value", "domain": "domain", "path": "path",
+                     "secure": "secure", "httpOnly": "httpOnly", "expiry": "expires", "sameSite": "sameSite"}
+
+
+def is_auth_redirect(url: str) -> bool:
+    return any(marker in (url or "") for marker in AUTH_REDIRECT_MARKERS)
+
+
+class CookieStore:
+    """LinkedIn cookies persisted as JSON, so a restarted service can skip the login form."""
+
+    def __init__(self, path: str):
+        self.path = path
+        self._lock = threading.Lock()
+
+    def load(self) -> List[Dict]:
+        with self._lock:
+            try:
+                with open(self.path, encoding="utf-8") as f:
+                    return json.load(f)
+            except FileNotFoundError:
+                return []
+            except (OSError, ValueError) as e:
+                logger.warning("Ignoring unreadable cookie store %s: %s", self.path, e)
+                return []
+
+    def save(self, cookies: List[Dict]):
+        cookies = [cookie for cookie in cookies if "linkedin.com" in cookie.get("domain", "")]
+        with self._lock:
+            tmp_path = self.path + ".tmp"
+            # The cookies are the account's credentials; keep them readable by this user only
+            fd = os.open(tmp_path, os.O_WRONLY | os.O_CREAT | os.O_TRUNC, 0o600)
+            with os.fdopen(fd, "w", encoding="utf-8") as f:
+                json.dump(cookies, f)
+            os.replace(tmp_path, self.path)
+
+    def clear(self):
+        with self._lock:
+            try:
+                os.remove(self.path)
+            except FileNotFoundError:
+                pass
+
+
+def restore_cookies(driver, cookies: List[Dict]) -> bool:
+    """Load saved cookies into the browser before its first LinkedIn navigation."""
+    if not cookies:
+        return False
+    cdp_cookies = [
+        {cdp: cookie[field] for field, cdp in CDP_COOKIE_FIELDS.items() if field in cookie}
+        for cookie in cookies
+    ]
+    try:
+        # CDP sets cookies for any domain without loading a page first
+        driver.execute_cdp_cmd("Network.setCookies", {"cookies": cdp_cookies})
+    except (WebDriverException, AttributeError):
+        driver.get("https://www.linkedin.com/robots.txt")
+        for cookie in cookies:
+            try:
+                driver.add_cookie(cookie)
+            except WebDriverException as e:
+                logger.debug("Skipping cookie %s: %s", cookie.get('name'), e)
+    return True
@@ -1,15 +1,27 @@
 from fastapi import FastAPI, HTTPException
-from pydantic import BaseModel
-import requests
+from pydantic import BaseModel, Field
 import os
+import sys
+import logging
+from concurrent.futures import ThreadPoolExecutor
 from dotenv import load_dotenv
 from urllib.parse import urlparse
 from fastapi.middleware.cors import CORSMiddleware
 
-# Load environment variables
-load_dotenv()
+# Load the service's .env first: the common modules read their settings on import, logging included
+load_dotenv(os.path.join(os.path.dirname(os.path.abspath(__file__)), ".env"))
+
+# Make api/common importable whether the service is started from its own folder or from api/
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from common.disk_cache import DiskCache
+from common.search_gateway import SearchError, SearchGateway, load_backends
+from common.structured_logging import CorrelationIdMiddleware, configure_logging
+
+configure_logging("linkedin_api")
+logger = logging.getLogger(__name__)
 
 app = FastAPI()
+app.add_middleware(CorrelationIdMiddleware)
 
 # Add CORS middleware
 origins = [
@@ -25,12 +37,33 @@ app.add_middleware(
     allow_headers=["*"],  # Allows all headers
 )
 
-# Get your API key from the environment variable
-SERPAPI_KEY = os.getenv("SERPAPI_KEY")
+# SerpAPI responses are cached on disk so repeated searches skip the quota and the round trip
+SERPAPI_CACHE_ENABLED = os.getenv("SERPAPI_CACHE_ENABLED", "1") == "1"
+SERPAPI_CACHE_PATH = os.getenv(
+    "SERPAPI_CACHE_PATH", os.path.join(os.path.dirname(os.path.abspath(__file__)), "serpapi_cache.sqlite3")
+)
+SERPAPI_CACHE_TTL = int(os.getenv("SERPAPI_CACHE_TTL", "21600"))
+SERPAPI_CACHE_MAX_ENTRIES = int(os.getenv("SERPAPI_CACHE_MAX_ENTRIES", "5000"))
+
+# Long keyword lists are split into several queries, each paged with `start` offsets until the target is met.
+# Pages are asked for 20 results at a time; a backend with smaller pages (Google's HTML, 10) advances by its own size,
+# and no query is read past SERPAPI_MAX_PAGES * SERPAPI_RESULTS_PER_PAGE results.
+SERPAPI_RESULTS_PER_PAGE = 20
+SERPAPI_KEYWORDS_PER_QUERY = int(os.getenv("SERPAPI_KEYWORDS_PER_QUERY", "6"))
+SERPAPI_MAX_PAGES = int(os.getenv("SERPAPI_MAX_PAGES", "3"))
+SERPAPI_CONCURRENCY = int(os.getenv("SERPAPI_CONCURRENCY", "4"))
+
+serpapi_cache = DiskCache(SERPAPI_CACHE_PATH, ttl=SERPAPI_CACHE_TTL, max_entries=SERPAPI_CACHE_MAX_ENTRIES)
+
+# SerpAPI first; Google's HTML results are raced against it when it runs slow and take over when it fails
+SEARCH_BACKENDS = os.getenv("LINKEDIN_API_SEARCH_BACKENDS", "serpapi,google_html")
+search_gateway = SearchGateway(load_backends(SEARCH_BACKENDS))
 
 class SearchRequest(BaseModel):
     keywords: str
     location: str
+    use_cache: bool = True  # False always asks SerpAPI, then refreshes the cached copy
+    target: int = Field(15, ge=1, le=500)  # Unique companies wanted
 
 def get_company_name(url):
     parsed_url = urlparse(url)
@@ -39,51 +72,100 @@ def get_company_name(url):
         return path_parts[2].lower()
     return None
 
-def get_search_results(query):
-    url = "https://serpapi.com/search"
-    params = {
-        "q": query,
-        "api_key": SERPAPI_KEY,
-        "num": 20  # Fetch up to 20 results to account for duplicates
-    }
-    
-    try:
-        response = requests.get(url, params=params)
-        response.raise_for_status()
-        data = response.json()
-
-        unique_results = {}
-        for result in data.get("organic_results", []):
-            link = result.get("link")
-            if link:
-                company_name = get_company_name(link)
-                if company_name and company_name not in unique_results:
-                    unique_results[company_name] = {
-                        "title": result.get("title"),
-                        "link": link,
-                        "snippet": result.get("snippet")
-                    }
-        
-        return list(unique_results.values())[:15]  # Return up to 15 unique results
-    except requests.exceptions.RequestException as e:
-        raise HTTPException(status_code=500, detail=f"Error fetching search results: {str(e)}")
+def normalize_query(query):
+    # Google ignores case and repeated whitespace, so these spellings share one cache entry
+    return " ".join(query.split()).lower()
+
+def build_search_queries(keywords, location, keywords_per_query=SERPAPI_KEYWORDS_PER_QUERY):
+    queries = []
+    for i in range(0, len(keywords), keywords_per_query):
+        keyword_query = ' OR '.join([f'"{keyword}"' for keyword in keywords[i:i + keywords_per_query]])
+        queries.append(f'site:linkedin.com/company/ ({keyword_query}) "{location}"')
+    return queries
+
+def fetch_organic_results(query, use_cache=True, start=0):
+    """Return (organic results, page size): the results from `start`, and how many positions they cover."""
+    cache_key = normalize_query(query)
+    if start:
+        cache_key += f"|start={start}"
+    if SERPAPI_CACHE_ENABLED and use_cache:
+        cached = serpapi_cache.get(cache_key)
+        if cached is not None:
+            return cached["results"], cached["page_size"]
 
+    # Fetch up to 20 results to account for duplicates
+    response = search_gateway.search(query, start=start, num=SERPAPI_RESULTS_PER_PAGE)
+
+    if SERPAPI_CACHE_ENABLED:
+        serpapi_cache.set(cache_key, {"results": response.results, "page_size": response.page_size})
+    return response.results, response.page_size
+
+def add_unique_results(unique_results, organic_results):
+    for result in organic_results:
+        link = result.get("link")
+        if link:
+            company_name = get_company_name(link)
+            if company_name and company_name not in unique_results:
+                unique_results[company_name] = {
+                    "title": result.get("title"),
+                    "link": link,
+                    "snippet": result.get("snippet")
+                }
+
+def get_search_results(queries, target=15, use_cache=True):
+    """Run every query, page by page, until `target` unique companies are found or the results run out.
+
+    Each round fetches the next page of every query that still has results, all at once.
+    Results are merged in query order so the same request always returns the same companies.
+    """
+    unique_results = {}
+    errors = []
+    max_depth = SERPAPI_MAX_PAGES * SERPAPI_RESULTS_PER_PAGE
+    pending = [(query, 0) for query in queries]
+
+    with ThreadPoolExecutor(max_workers=SERPAPI_CONCURRENCY) as executor:
+        while pending and len(unique_results) < target:
+            futures = [executor.submit(fetch_organic_results, query, use_cache, start) for query, start in pending]
+            next_pending = []
+            for (query, start), future in zip(pending, futures):
+                try:
+                    organic_results, page_size = future.result()
+                except SearchError as e:
+                    logger.warning("Search failed for results %s+ of %r: %s", start + 1, query, e)
+                    errors.append(e)
+                    continue
+                add_unique_results(unique_results, organic_results)
+                # The next page starts right after what this one covered, whichever backend answered it
+                if organic_results and start + page_size < max_depth:
+                    next_pending.append((query, start + page_size))
+            pending = next_pending
+
+    if errors and not unique_results:
+        raise HTTPException(status_code=500, detail=f"Error fetching search results: {str(errors[0])}")
+    return list(unique_results.values())[:target]
+
+# Plain def: the search fan-out blocks, so FastAPI runs it in its threadpool
 @app.post("/search")
-async def search_and_summarize(search_request: SearchRequest):
+def search_and_summarize(search_request: SearchRequest):
     try:
-        # Prepare the search query
+        # Prepare the search queries
         keywords = [keyword.strip().strip('"') for keyword in search_request.keywords.split(",")]
-        keyword_query = ' OR '.join([f'"{keyword}"' for keyword in keywords])
-        search_query = f'site:linkedin.com/company/ ({keyword_query}) "{search_request.location}"'
-        
-        results = get_search_results(search_query)
+        search_queries = build_search_queries(keywords, search_request.location)
+
+        results = get_search_results(search_queries, target=search_request.target, use_cache=search_request.use_cache)
 
         return {
             "companies": results
         }
+    except HTTPException:
+        raise
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e))
 
+@app.get("/stats")
+async def stats():
+    return {"serpapi_cache": serpapi_cache.stats(), "search": search_gateway.stats()}
+
 if __name__ == "__main__":
     import uvicorn
     uvicorn.run(app, host="0.0.0.0", port=8002)
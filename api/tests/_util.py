@@ -0,0 +1,20 @@
+import functools
+import importlib.util
+import os
+import sys
+
+API_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+# Tests import the shared helpers as common.<module>, like the services do
+if API_DIR not in sys.path:
+    sys.path.insert(0, API_DIR)
+
+
+@functools.lru_cache(maxsize=None)
+def load_service(folder):
+    """Import api/<folder>/app.py once under a unique module name (every service module is called app)."""
+    service_dir = os.path.join(API_DIR, folder)
+    spec = importlib.util.spec_from_file_location(f"{folder}_app", os.path.join(service_dir, "app.py"))
+    module = importlib.util.module_from_spec(spec)
+    spec.loader.exec_module(module)
+    return module
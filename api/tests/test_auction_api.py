@@ -0,0 +1,68 @@
+"""The streamed all-pages response of auction_api, with the page fetches replaced by a stub."""
+import asyncio
+import json
+
+import pytest
+from _util import load_service
+from fastapi.testclient import TestClient
+
+auction_app = load_service("auction_api")
+
+
+@pytest.fixture
+def listing(monkeypatch):
+    """Three result pages, the second failing; records whether the page generator was closed."""
+    state = {"closed": False}
+
+    async def iter_all_auction_pages(keyword, max_pages, concurrency):
+        try:
+            yield 1, [{"Auction ID": "A1"}, {"Auction ID": "A2"}], None
+            yield 3, [{"Auction ID": "A2"}, {"Auction ID": "A3"}], None
+            yield 2, [], "ReadTimeout"
+        finally:
+            state["closed"] = True
+
+    monkeypatch.setattr(auction_app, "iter_all_auction_pages", iter_all_auction_pages)
+    return state
+
+
+def stream(fmt="ndjson"):
+    client = TestClient(auction_app.app)
+    return client.post(f"/scrape-auctions/?format={fmt}", json={"keyword": "steel", "all_pages": True, "stream": True})
+
+
+def test_ndjson_stream(listing):
+    response = stream()
+
+    assert response.headers["content-type"].startswith("application/x-ndjson")
+    assert [json.loads(line) for line in response.text.splitlines()] == [
+        {"event": "page", "page": 1, "data": [{"Auction ID": "A1"}, {"Auction ID": "A2"}]},
+        {"event": "page", "page": 3, "data": [{"Auction ID": "A3"}]},
+        {"event": "error", "page": 2, "detail": "ReadTimeout"},
+        {"event": "done", "pages": 3, "total": 3, "failed_pages": [2]},
+    ]
+    assert listing["closed"]
+
+
+def test_sse_stream(listing):
+    response = stream("sse")
+
+    assert response.headers["content-type"].startswith("text/event-stream")
+    events = [block.split("\n") for block in response.text.strip().split("\n\n")]
+    assert [lines[0] for lines in events] == ["event: page", "event: page", "event: error", "event: done"]
+    assert json.loads(events[-1][1].removeprefix("data: ")) == {"pages": 3, "total": 3, "failed_pages": [2]}
+
+
+def test_closing_the_stream_closes_the_page_fetches(listing):
+    async def read_two_events():
+        pages = auction_app.iter_all_auction_pages("steel", 50, 4)
+        events = auction_app.stream_all_auctions(await pages.__anext__(), pages)
+        read = [await events.__anext__(), await events.__anext__()]
+        await events.aclose()
+        # Checked before asyncio.run shuts down, which would close any leftover generator itself
+        return read, listing["closed"]
+
+    read, closed = asyncio.run(read_two_events())
+
+    assert [event for event, _ in read] == ["page", "page"]
+    assert closed
@@ -0,0 +1,88 @@
+"""Parallel Selenium pagination of bid_api, with the browser steps replaced by stubs."""
+import os
+import time
+
+import pytest
+from _util import load_service
+
+from common.driver_pool import DriverPool
+
+# The service module opens its bid index on import; the tests never want the real one
+os.environ.setdefault("BID_INDEX_ENABLED", "0")
+
+
+class PagedDriver:
+    """Stands in for a browser showing one page of the result list."""
+
+    current_url = "about:blank"
+
+    def __init__(self):
+        self.page = None
+        self.pages_read = []
+
+    def quit(self):
+        pass
+
+
+@pytest.fixture
+def bid_app(monkeypatch):
+    app = load_service("bid_api")
+    created = []
+
+    def factory():
+        created.append(PagedDriver())
+        return created[-1]
+
+    pool = DriverPool(factory, size=2, reset=lambda driver: None, acquire_timeout=1.0)
+    pool.created = created
+
+    def submit_search(driver, search_text):
+        driver.page = 1
+
+    def go_to_page(driver, page):
+        driver.page = page
+
+    def iter_bid_card_pages(driver, time_limit=30, extraction_mode=None, cancel_event=None, max_pages=None):
+        for _ in range(max_pages):
+            time.sleep(0.05)  # long enough for the other worker to start
+            driver.pages_read.append(driver.page)
+            yield [{"bid_number": f"BID NO: GEM/{driver.page}/{n}"} for n in range(2)]
+            if driver.page == app.get_total_pages(driver):
+                return
+            driver.page += 1
+
+    monkeypatch.setattr(app, "driver_pool", pool)
+    monkeypatch.setattr(app, "submit_search", submit_search)
+    monkeypatch.setattr(app, "go_to_page", go_to_page)
+    monkeypatch.setattr(app, "iter_bid_card_pages", iter_bid_card_pages)
+    monkeypatch.setattr(app, "get_total_pages", lambda driver: 6)
+    return app
+
+
+def scraped_pages(cards):
+    return sorted({int(card["bid_number"].split("/")[1]) for page in cards for card in page})
+
+
+def test_parallel_search_spreads_pages_over_free_drivers(bid_app):
+    pages = list(bid_app.iter_bids_selenium_parallel("pump", concurrency=2, time_limit=5))
+
+    assert scraped_pages(pages) == [1, 2, 3, 4, 5, 6]
+    assert bid_app.driver_pool.stats()["created"] == 2
+    assert bid_app.driver_pool.stats()["in_use"] == 0
+
+
+def test_parallel_search_keeps_every_page_when_the_pool_is_busy(bid_app):
+    # Another search holds the second driver, so only the first worker gets one
+    busy = bid_app.driver_pool.acquire()
+    try:
+        pages = list(bid_app.iter_bids_selenium_parallel("pump", concurrency=2, time_limit=5))
+    finally:
+        bid_app.driver_pool.release(busy)
+
+    assert scraped_pages(pages) == [1, 2, 3, 4, 5, 6]
+    assert busy.pages_read == []
+    searched = [driver for driver in bid_app.driver_pool.created if driver.pages_read]
+    assert len(searched) == 1 and sorted(searched[0].pages_read) == [1, 2, 3, 4, 5, 6]
+    stats = bid_app.driver_pool.stats()
+    # The spare worker gave up at once instead of queueing behind other borrowers until the deadline
+    assert stats["acquired"] == 2 and stats["waiting"] == 0 and stats["in_use"] == 0
@@ -0,0 +1,124 @@
+"""BidIndex on a temporary SQLite file, and the crawl rule that decides when it may answer searches."""
+import os
+from datetime import datetime, timedelta
+
+import pytest
+from _util import load_service
+
+# The service module opens its bid index on import; the tests never want the real one
+os.environ.setdefault("BID_INDEX_ENABLED", "0")
+
+bid_app = load_service("bid_api")
+
+from bid_index import IST, BidIndex, fts_query  # noqa: E402  (bid_api/ is on sys.path once the service is loaded)
+
+
+def gem_date(days):
+    return (datetime.now(IST) + timedelta(days=days)).strftime("%d-%m-%Y %I:%M %p")
+
+
+def card(number, items="Centrifugal pump", days=7):
+    return {
+        "bid_number": f"BID NO: GEM/2026/B/{number}",
+        "link": f"https://bidplus.gem.gov.in/showbidDocument/{number}",
+        "items": items,
+        "quantity": "10",
+        "department": "Ministry of Jal Shakti",
+        "start_date": gem_date(-1),
+        "end_date": gem_date(days),
+    }
+
+
+@pytest.fixture
+def index(tmp_path):
+    return BidIndex(str(tmp_path / "bids.sqlite3"), key=bid_app.bid_key)
+
+
+def test_fts_query_quotes_every_token():
+    assert fts_query('pump "OR" NEAR(valve*') == '"pump"* "OR"* "NEAR"* "valve"*'
+    assert fts_query('"*-^:()') == ""
+
+
+@pytest.mark.parametrize("text", ['"', 'pump"', "pump OR", "NOT pump", "NEAR(pump valve)", "items:pump", "*", "^pump",
+                                  "pump -valve", "') DROP TABLE bids; --"])
+def test_hostile_search_text_is_never_read_as_fts_syntax(index, text):
+    index.upsert([card(1, "Centrifugal pump"), card(2, "Butterfly valve")])
+
+    numbers = {row["bid_number"] for row in index.search(text)}
+
+    assert numbers <= {"BID NO: GEM/2026/B/1", "BID NO: GEM/2026/B/2"}
+    assert index.stats()["bids"] == 2
+
+
+def test_search_prefix_matches_and_returns_rows_as_stored(index):
+    index.upsert([card(1, "Centrifugal pumps"), card(2, "Butterfly valve")])
+
+    assert index.search("centrifugal pum") == [card(1, "Centrifugal pumps")]
+
+
+def test_upsert_counts_only_bids_it_had_not_seen(index):
+    assert index.upsert([card(1), card(2)]) == 2
+    # The same bid in its card form and bare form, a refresh, and one new bid
+    assert index.upsert([card(1, "Updated pump"), dict(card(2), bid_number="GEM/2026/B/2"), card(3)]) == 1
+    assert index.upsert([]) == 0
+
+    assert index.stats()["bids"] == 3
+    assert [row["items"] for row in index.search("updated")] == ["Updated pump"]
+
+
+def test_purge_expired_removes_only_closed_bids(index):
+    index.upsert([card(1, days=3), card(2, days=-1), dict(card(3), end_date="not a date")])
+
+    assert index.purge_expired() == 1
+    assert index.purge_expired() == 0
+    assert sorted(row["bid_number"] for row in index.search("")) == ["BID NO: GEM/2026/B/1", "BID NO: GEM/2026/B/3"]
+
+
+@pytest.fixture
+def crawl(index, monkeypatch):
+    """Run crawl_bid_index over a fake listing of `pages` pages, newest first."""
+    monkeypatch.setattr(bid_app, "bid_index", index)
+
+    def run(pages, max_pages=1000, first_number=0):
+        listing = [[card(100 + first_number + page * 10 + n) for n in range(10)] for page in range(pages)]
+
+        def iter_bids_http(search_text, time_limit=30, cancel_event=None, sort=None, progress=None):
+            for number, page in enumerate(listing, 1):
+                yield page
+                if number == len(listing) and progress is not None:
+                    progress["complete"] = True
+
+        monkeypatch.setattr(bid_app, "iter_bids_http", iter_bids_http)
+        monkeypatch.setattr(bid_app, "INDEX_MAX_PAGES", max_pages)
+        bid_app.crawl_bid_index()
+
+    return run
+
+
+def test_crawl_cut_short_leaves_the_index_not_ready(index, crawl):
+    crawl(pages=5, max_pages=3)
+
+    assert index.stats()["bids"] == 30
+    assert not index.is_ready()
+    assert index.get_meta("last_crawl_completed") is None
+
+
+def test_full_crawl_makes_the_index_ready(index, crawl):
+    crawl(pages=5, max_pages=3)
+    crawl(pages=5)
+
+    assert index.is_ready()
+    assert index.get_meta("full_crawl_completed") == index.get_meta("last_crawl_completed")
+
+
+def test_incremental_crawl_stops_at_known_bids_and_keeps_the_index_ready(index, crawl):
+    crawl(pages=3)
+    first_completed = index.get_meta("full_crawl_completed")
+
+    # Ten new bids on top of the listing; the crawl catches up on the next page, well before the page limit
+    crawl(pages=4, first_number=-10, max_pages=2)
+
+    assert index.stats()["bids"] == 40
+    assert index.is_ready()
+    assert index.get_meta("full_crawl_completed") == first_completed
+    assert index.get_meta("last_crawl_completed") is not None
@@ -0,0 +1,61 @@
+"""Which URLs companydetailLinkedin accepts as company pages, and how it spells them."""
+import os
+
+import pytest
+from _util import load_service
+from fastapi.testclient import TestClient
+
+# The service module opens its company cache on import; keep it off disk
+os.environ.setdefault("LINKEDIN_COMPANY_CACHE_PATH", ":memory:")
+
+company_app = load_service("companydetailLinkedin")
+
+
+@pytest.mark.parametrize("url, expected", [
+    ("https://www.linkedin.com/company/acme", "https://www.linkedin.com/company/acme"),
+    # Missing scheme, with and without www
+    ("linkedin.com/company/acme", "https://www.linkedin.com/company/acme"),
+    ("www.linkedin.com/company/acme/", "https://www.linkedin.com/company/acme"),
+    # Sub-pages, query strings, fragments, case and whitespace
+    ("https://www.linkedin.com/company/Acme/about/", "https://www.linkedin.com/company/acme"),
+    ("https://www.linkedin.com/company/acme/posts/?feedView=all", "https://www.linkedin.com/company/acme"),
+    ("  http://WWW.LinkedIn.com/company/acme/life#top ", "https://www.linkedin.com/company/acme"),
+    # Country subdomains and the other page kinds with the same layout
+    ("https://in.linkedin.com/company/acme", "https://www.linkedin.com/company/acme"),
+    ("https://www.linkedin.com/school/iit-bombay/", "https://www.linkedin.com/school/iit-bombay"),
+    ("https://www.linkedin.com/showcase/acme-cloud", "https://www.linkedin.com/showcase/acme-cloud"),
+])
+def test_company_urls_are_normalized(url, expected):
+    assert company_app.normalize_company_url(url) == expected
+
+
+@pytest.mark.parametrize("url", [
+    # Foreign hosts, including look-alikes
+    "https://example.com/company/acme",
+    "https://notlinkedin.com/company/acme",
+    "https://linkedin.com.evil.io/company/acme",
+    "example.com/company/acme",
+    # Profiles, jobs and bare company paths
+    "https://www.linkedin.com/in/jane-doe",
+    "linkedin.com/in/jane-doe/",
+    "https://www.linkedin.com/jobs/view/123",
+    "https://www.linkedin.com/company/",
+    "https://www.linkedin.com",
+    # Other schemes and junk
+    "ftp://www.linkedin.com/company/acme",
+    "javascript:alert(1)",
+    "",
+    "::::",
+])
+def test_other_urls_are_rejected(url):
+    with pytest.raises(company_app.InvalidCompanyUrl):
+        company_app.normalize_company_url(url)
+
+
+def test_endpoints_answer_400_before_touching_a_browser():
+    client = TestClient(company_app.app)
+
+    assert client.post("/scrape-company/", json={"company_url": "https://www.linkedin.com/in/jane-doe"}).status_code == 400
+    response = client.post("/scrape-companies/", json={"company_urls": ["linkedin.com/company/acme", "example.com"]})
+    assert response.status_code == 400
+    assert "example.com" in response.json()["detail"]
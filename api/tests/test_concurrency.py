@@ -0,0 +1,293 @@
+"""Slot accounting of DriverPool, SingleFlight coalescing and LRU eviction of DiskCache, with stubs only.
+
+Run from api/:  python -m pytest -q
+"""
+import threading
+import time
+from types import SimpleNamespace
+
+import _util  # noqa: F401  (puts api/ on sys.path)
+import pytest
+from selenium.common.exceptions import WebDriverException
+
+from common import disk_cache
+from common.disk_cache import DiskCache
+from common.driver_pool import DriverPool, PoolTimeout
+from common.single_flight import SingleFlight
+
+
+class StubDriver:
+    def __init__(self, number):
+        self.number = number
+        self.alive = True
+        self.quit_calls = 0
+
+    @property
+    def current_url(self):
+        if not self.alive:
+            raise WebDriverException("browser is gone")
+        return "about:blank"
+
+    def quit(self):
+        self.quit_calls += 1
+
+
+class StubFactory:
+    """Hands out numbered StubDrivers; raises while `failures` is above zero."""
+
+    def __init__(self, failures=0):
+        self.failures = failures
+        self.created = []
+
+    def __call__(self):
+        if self.failures > 0:
+            self.failures -= 1
+            raise WebDriverException("chromedriver did not start")
+        driver = StubDriver(len(self.created) + 1)
+        self.created.append(driver)
+        return driver
+
+
+def make_pool(factory, **kwargs):
+    kwargs.setdefault("reset", lambda driver: None)
+    kwargs.setdefault("acquire_timeout", 1.0)
+    return DriverPool(factory, **kwargs)
+
+
+def wait_until(condition, timeout=2.0):
+    deadline = time.monotonic() + timeout
+    while not condition():
+        assert time.monotonic() < deadline, "condition not met in time"
+        time.sleep(0.01)
+
+
+def test_factory_failure_on_acquire_frees_the_slot():
+    factory = StubFactory(failures=1)
+    pool = make_pool(factory, size=1)
+
+    with pytest.raises(WebDriverException):
+        pool.acquire()
+    assert pool.stats()["starting"] == 0
+
+    # The failed launch must not keep the only slot reserved
+    driver = pool.acquire(timeout=0.2)
+    assert driver is factory.created[0]
+    assert pool.stats()["in_use"] == 1
+
+
+def test_factory_failure_during_start_frees_the_slot():
+    factory = StubFactory(failures=1)
+    pool = make_pool(factory, size=2)
+    pool.start()
+
+    stats = pool.stats()
+    assert stats["idle"] == 0 and stats["starting"] == 0
+    assert pool.acquire(timeout=0.2) is factory.created[0]
+    assert pool.acquire(timeout=0.2) is factory.created[1]
+
+
+def test_factory_failure_wakes_a_waiting_borrower():
+    factory = StubFactory()
+    pool = make_pool(factory, size=1, max_uses=1)
+    first = pool.acquire()
+
+    factory.failures = 1  # the replacement for the recycled driver will fail
+    acquired = []
+    waiter = threading.Thread(target=lambda: acquired.append(pool.acquire(timeout=2.0)))
+    waiter.start()
+    wait_until(lambda: pool.stats()["waiting"] == 1)
+
+    pool.release(first)
+    waiter.join(3.0)
+
+    assert acquired and acquired[0] is factory.created[1]
+    assert first.quit_calls == 1
+
+
+def test_full_pool_times_out():
+    pool = make_pool(StubFactory(), size=1)
+    pool.acquire()
+
+    with pytest.raises(PoolTimeout):
+        pool.acquire(timeout=0.05)
+    assert pool.stats()["timeouts"] == 1
+
+
+def test_driver_is_recycled_after_max_uses():
+    quit_drivers = []
+    factory = StubFactory()
+    pool = make_pool(factory, size=1, max_uses=2, on_quit=quit_drivers.append)
+
+    with pool.borrow() as driver:
+        pass
+    with pool.borrow() as again:
+        assert again is driver
+
+    wait_until(lambda: pool.stats()["idle"] == 1)
+    stats = pool.stats()
+    assert stats["recycled"] == 1 and stats["created"] == 2
+    assert stats["in_use"] == 0 and stats["starting"] == 0
+    assert driver.quit_calls == 1 and quit_drivers == [driver]
+    assert pool.acquire(timeout=0.2) is factory.created[1]
+
+
+def test_failed_reset_recycles_the_driver():
+    def reset(driver):
+        raise WebDriverException("tab crashed")
+
+    factory = StubFactory()
+    pool = make_pool(factory, size=1, reset=reset)
+    with pool.borrow() as driver:
+        pass
+
+    wait_until(lambda: pool.stats()["idle"] == 1)
+    assert driver.quit_calls == 1
+    assert pool.stats()["recycled"] == 1
+
+
+def test_unhealthy_idle_driver_is_replaced():
+    factory = StubFactory()
+    pool = make_pool(factory, size=1)
+    pool.start()
+    factory.created[0].alive = False
+
+    driver = pool.acquire(timeout=0.2)
+
+    assert driver is factory.created[1]
+    assert factory.created[0].quit_calls == 1
+    stats = pool.stats()
+    assert stats["failed_health_checks"] == 1 and stats["in_use"] == 1 and stats["starting"] == 0
+
+
+def test_close_quits_idle_drivers_and_rejects_borrowers():
+    factory = StubFactory()
+    pool = make_pool(factory, size=2)
+    pool.start()
+    pool.close()
+
+    assert [driver.quit_calls for driver in factory.created] == [1, 1]
+    with pytest.raises(PoolTimeout):
+        pool.acquire(timeout=0.05)
+
+
+class GatedCall:
+    """Counts calls and blocks each one until `gate` is set, so that others can pile up behind it."""
+
+    def __init__(self, result=None, error=None):
+        self.result = result
+        self.error = error
+        self.gate = threading.Event()
+        self.calls = 0
+
+    def __call__(self):
+        self.calls += 1
+        self.gate.wait(2.0)
+        if self.error is not None:
+            raise self.error
+        return self.result
+
+
+def run_concurrently(flight, key, func, callers):
+    """Start `callers` threads on flight.do and return their (result, shared) pairs or exceptions."""
+    outcomes = []
+    lock = threading.Lock()
+
+    def call():
+        try:
+            outcome = flight.do(key, func)
+        except Exception as e:
+            outcome = e
+        with lock:
+            outcomes.append(outcome)
+
+    threads = [threading.Thread(target=call) for _ in range(callers)]
+    threads[0].start()
+    wait_until(lambda: flight.stats()["in_flight"] == 1)
+    for thread in threads[1:]:
+        thread.start()
+    wait_until(lambda: flight.stats()["coalesced"] == callers - 1)
+    func.gate.set()
+    for thread in threads:
+        thread.join(3.0)
+    return outcomes
+
+
+def test_single_flight_shares_one_result():
+    flight = SingleFlight(memo_seconds=0)
+    func = GatedCall(result={"cards": 3})
+
+    outcomes = run_concurrently(flight, "search:pump", func, callers=4)
+
+    assert func.calls == 1
+    assert all(result == {"cards": 3} for result, _ in outcomes)
+    assert sorted(shared for _, shared in outcomes) == [False, True, True, True]
+    assert flight.stats()["in_flight"] == 0
+
+
+def test_single_flight_shares_errors_without_remembering_them():
+    flight = SingleFlight(memo_seconds=60)
+    error = RuntimeError("portal is down")
+    func = GatedCall(error=error)
+
+    outcomes = run_concurrently(flight, "search:pump", func, callers=3)
+
+    assert outcomes == [error, error, error]
+    # A failure is not memoised: the next call runs the work again
+    func.error = None
+    func.result = "recovered"
+    assert flight.do("search:pump", func) == ("recovered", False)
+    assert func.calls == 2
+
+
+def test_single_flight_memo_expires():
+    flight = SingleFlight(memo_seconds=0.1)
+    calls = []
+
+    def work():
+        calls.append(None)
+        return len(calls)
+
+    assert flight.do("key", work) == (1, False)
+    assert flight.do("key", work) == (1, True)
+    assert flight.do("other", work) == (2, False)
+    time.sleep(0.15)
+
+    assert flight.do("key", work) == (3, False)
+    stats = flight.stats()
+    assert stats["memo_hits"] == 1 and stats["leaders"] == 3
+
+
+@pytest.fixture
+def clock(monkeypatch):
+    now = [1000.0]
+    monkeypatch.setattr(disk_cache, "time", SimpleNamespace(time=lambda: now[0]))
+    return now
+
+
+def test_disk_cache_evicts_least_recently_used(tmp_path, clock):
+    cache = DiskCache(str(tmp_path / "cache.sqlite3"), ttl=3600, max_entries=2)
+    cache.set("a", {"value": 1})
+    clock[0] += 1
+    cache.set("b", {"value": 2})
+    clock[0] += 1
+    assert cache.get("a") == {"value": 1}  # "a" is now more recent than "b"
+    clock[0] += 1
+    cache.set("c", {"value": 3})
+
+    assert cache.get("b") is None
+    assert cache.get("a") == {"value": 1}
+    assert cache.get("c") == {"value": 3}
+    stats = cache.stats()
+    assert stats["entries"] == 2 and stats["evictions"] == 1
+
+
+def test_disk_cache_expires_entries_after_ttl(tmp_path, clock):
+    cache = DiskCache(str(tmp_path / "cache.sqlite3"), ttl=60, max_entries=10)
+    cache.set("a", [1, 2])
+    clock[0] += 59
+    assert cache.get("a") == [1, 2]
+    clock[0] += 2
+
+    assert cache.get("a") is None
+    stats = cache.stats()
+    assert stats["expired"] == 1 and stats["entries"] == 0
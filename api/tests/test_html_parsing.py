@@ -0,0 +1,59 @@
+"""The lxml XPath parsers must return exactly what the BeautifulSoup ones do, markup noise included."""
+import pytest
+from _util import load_service
+
+from common.html_parsing import LXML_AVAILABLE, lxml_document, parse_html, text_of
+from common.search_gateway import parse_google_results
+
+pytestmark = pytest.mark.skipif(not LXML_AVAILABLE, reason="lxml is not installed")
+
+NOISY_TEXT = (
+    "A<style>.x{color:red}</style><!-- tracking -->B"
+    "<script>var q = '<b>not text</b>';</script><b>C<script>1</script></b>"
+)
+
+GOOGLE_PAGE = f"""<html><head><style>body{{margin:0}}</style><script>window.g = 1;</script></head><body>
+<div class="g"><a href="https://www.linkedin.com/in/jane">
+  <h3>{NOISY_TEXT}</h3></a>
+  <span class="aCOpRe">Jane <!-- c -->Doe<style>.s{{}}</style> - Engineer</span></div>
+<div class="tF2Cxc"><a href="https://www.linkedin.com/in/joe"><h3>Joe<script>x()</script></h3></a></div>
+</body></html>"""
+
+AUCTION_PAGE = f"""<html><body>
+<div class="listing-content">
+  <div class="index">Auction ID : 42<script>track(42)</script></div>
+  <a class="brief" href="/auction/42"><div class="brief">{NOISY_TEXT}</div></a>
+  <i class="fa fa-map-marker"></i><span>Delhi<!-- office --></span>
+  <span class="start-date">Start Date : 01-01-2026<style>.d{{}}</style></span>
+  <span class="end-date">End Date : 02-01-2026</span>
+  <div class="department">Ministry<script>x()</script> of Steel</div>
+</div>
+</body></html>"""
+
+
+@pytest.mark.parametrize("markup", [
+    NOISY_TEXT,
+    "<p>plain</p>",
+    "<div>x<noscript>y</noscript><template>z</template></div>",
+])
+def test_text_of_matches_beautifulsoup_text(markup):
+    html = f"<html><body><div id='target'>{markup}</div></body></html>"
+    soup_text = parse_html(html).find("div", id="target").text
+    assert text_of(lxml_document(html).get_element_by_id("target")) == soup_text
+
+
+def test_google_results_are_identical_across_parsers():
+    results = parse_google_results(GOOGLE_PAGE, parser="lxml")
+
+    assert results == parse_google_results(GOOGLE_PAGE, parser="html.parser")
+    assert results == parse_google_results(GOOGLE_PAGE, parser="html.parser", parse_only=None)
+    assert results[0]["title"] == "ABC"
+
+
+def test_auctions_are_identical_across_parsers():
+    auction_app = load_service("auction_api")
+    auctions = auction_app.parse_auctions(AUCTION_PAGE, parser="lxml")
+
+    assert auctions == auction_app.parse_auctions(AUCTION_PAGE, parser="html.parser")
+    assert auctions[0]["Brief"] == "ABC"
+    assert auctions[0]["Organizer"] == "Ministry of Steel"
@@ -0,0 +1,153 @@
+"""SearchGateway hedging and failover, and linkedin_api paging by page size, with stub backends."""
+import os
+import threading
+import time
+
+import pytest
+from _util import load_service
+
+from common import search_gateway
+from common.search_gateway import SearchBackend, SearchError, SearchGateway
+
+# linkedin_api opens its SerpAPI cache on import; keep it off disk
+os.environ.setdefault("SERPAPI_CACHE_PATH", ":memory:")
+
+
+class StubBackend(SearchBackend):
+    """Answers after `delay` seconds with numbered company links, or raises `error`."""
+
+    def __init__(self, name, delay=0.0, error=None, max_page_size=100, pause=0.0):
+        self.name = name
+        self.delay = delay
+        self.error = error
+        self.max_page_size = max_page_size
+        self.pause = pause
+        self.calls = []
+        self._lock = threading.Lock()
+
+    def throttle(self):
+        time.sleep(self.pause)
+
+    def search(self, query, start=0, num=10):
+        with self._lock:
+            self.calls.append(start)
+        time.sleep(self.delay)
+        if self.error is not None:
+            raise self.error
+        size = min(num, self.max_page_size)
+        return [{"title": self.name, "link": f"https://www.linkedin.com/company/c{start + n}", "snippet": None}
+                for n in range(size)]
+
+
+@pytest.fixture(autouse=True)
+def fast_hedge(monkeypatch):
+    # Until a backend has enough samples the hedge fires after the default delay
+    monkeypatch.setattr(search_gateway, "HEDGE_DEFAULT_MS", 100)
+
+
+def test_fast_primary_is_not_hedged():
+    primary, secondary = StubBackend("primary"), StubBackend("secondary")
+    response = SearchGateway([primary, secondary]).search("pumps")
+
+    assert response.backend == "primary" and not response.hedged
+    assert secondary.calls == []
+
+
+def test_hedge_fires_after_the_threshold():
+    primary, secondary = StubBackend("primary", delay=1.0), StubBackend("secondary")
+    gateway = SearchGateway([primary, secondary])
+
+    started = time.monotonic()
+    response = gateway.search("pumps")
+    elapsed = time.monotonic() - started
+
+    assert response.backend == "secondary" and response.hedged
+    assert 0.1 <= elapsed < 0.5
+    assert gateway.stats()["hedges"] == 1 and gateway.stats()["hedge_wins"] == 1
+
+
+def test_rate_limit_wait_does_not_trigger_a_hedge():
+    primary, secondary = StubBackend("primary", pause=0.3), StubBackend("secondary")
+    gateway = SearchGateway([primary, secondary])
+    response = gateway.search("pumps")
+
+    assert response.backend == "primary" and not response.hedged
+    assert secondary.calls == []
+    assert gateway.stats()["backends"]["primary"]["latency_ms"]["p50"] < 100
+
+
+def test_failed_backend_hands_over_straight_away():
+    primary = StubBackend("primary", error=SearchError("quota exhausted"))
+    secondary = StubBackend("secondary")
+    gateway = SearchGateway([primary, secondary])
+    response = gateway.search("pumps", start=20, num=20)
+
+    assert response.backend == "secondary" and not response.hedged
+    assert secondary.calls == [20]
+    assert gateway.stats()["backends"]["primary"]["errors"] == 1
+
+
+def test_unexpected_exceptions_count_as_backend_failures():
+    primary = StubBackend("primary", error=KeyError("organic_results"))
+    response = SearchGateway([primary, StubBackend("secondary")]).search("pumps")
+
+    assert response.backend == "secondary"
+
+
+def test_all_backends_failing_raises():
+    gateway = SearchGateway([
+        StubBackend("primary", error=SearchError("quota exhausted")),
+        StubBackend("secondary", error=SearchError("unusual traffic")),
+    ])
+
+    with pytest.raises(SearchError, match="primary: quota exhausted; secondary: unusual traffic"):
+        gateway.search("pumps")
+
+
+def test_page_size_is_capped_by_the_backend_that_answered():
+    gateway = SearchGateway([StubBackend("google", max_page_size=10)])
+
+    assert gateway.search("pumps", num=20).page_size == 10
+    assert gateway.search("pumps", num=5).page_size == 5
+
+
+def test_incomplete_backend_fails_when_created():
+    class NoSearch(SearchBackend):
+        name = "incomplete"
+
+    with pytest.raises(TypeError):
+        NoSearch()
+
+
+@pytest.fixture
+def linkedin_app(monkeypatch):
+    app = load_service("linkedin_api")
+    monkeypatch.setattr(app, "SERPAPI_CACHE_ENABLED", False)
+    return app
+
+
+def companies(results):
+    return sorted(int(result["link"].rsplit("/c", 1)[1]) for result in results)
+
+
+def test_paging_follows_the_page_size_of_each_answer(linkedin_app, monkeypatch):
+    # Google's HTML pages hold 10 results, not the 20 asked for; the next page must start right after them
+    google = StubBackend("google_html", max_page_size=10)
+    monkeypatch.setattr(linkedin_app, "search_gateway", SearchGateway([google]))
+
+    results = linkedin_app.get_search_results(["q"], target=1000, use_cache=False)
+
+    depth = linkedin_app.SERPAPI_MAX_PAGES * linkedin_app.SERPAPI_RESULTS_PER_PAGE
+    assert google.calls == list(range(0, depth, 10))
+    assert companies(results) == list(range(depth))
+
+
+def test_paging_stays_contiguous_across_failover(linkedin_app, monkeypatch):
+    serpapi = StubBackend("serpapi", error=SearchError("quota exhausted"))
+    google = StubBackend("google_html", max_page_size=10)
+    monkeypatch.setattr(linkedin_app, "search_gateway", SearchGateway([serpapi, google]))
+
+    results = linkedin_app.get_search_results(["q"], target=25, use_cache=False)
+
+    assert google.calls[:3] == [0, 10, 20]
+    assert companies(results) == list(range(25))
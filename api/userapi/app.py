@@ -173,18 +173,35 @@
 #     import uvicorn
 #     uvicorn.run(app, host="0.0.0.0", port=8006)
 
-import requests
-from bs4 import BeautifulSoup
-from fastapi import FastAPI
+import os
+import sys
+import math
+import asyncio
+from concurrent.futures import ThreadPoolExecutor
+from contextlib import aclosing
+from fastapi import FastAPI, HTTPException, Request
 from fastapi.middleware.cors import CORSMiddleware
-from pydantic import BaseModel
+from pydantic import BaseModel, Field
+from typing import List, Literal
 import logging
+from dotenv import load_dotenv
+
+# Load the service's .env first: the common modules read their settings on import, logging included
+load_dotenv(os.path.join(os.path.dirname(os.path.abspath(__file__)), ".env"))
+
+# Make api/common importable whether the service is started from its own folder or from api/
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from common.disk_cache import DiskCache
+from common.search_gateway import RESULT_STRAINER, SearchGateway, load_backends, parse_google_results
+from common.streaming import stream_response
+from common.structured_logging import CorrelationIdMiddleware, configure_logging, SAMPLED
 
 # Set up logging
-logging.basicConfig(level=logging.DEBUG)
+configure_logging("userapi")
 logger = logging.getLogger(__name__)
 
 app = FastAPI()
+app.add_middleware(CorrelationIdMiddleware)
 
 # Add CORS middleware
 app.add_middleware(
@@ -196,36 +213,97 @@ app.add_middleware(
 )
 
 
+# Google shows 10 results a page; further pages are fetched together with `start` offsets
+GOOGLE_RESULTS_PER_PAGE = 10
+GOOGLE_MAX_PAGES = int(os.getenv("USERAPI_GOOGLE_MAX_PAGES", "5"))
+GOOGLE_TIMEOUT = float(os.getenv("USERAPI_GOOGLE_TIMEOUT", "10"))
+HTTP_POOL_SIZE = int(os.getenv("USERAPI_HTTP_POOL_SIZE", "10"))
+# Every request to Google is spaced out, however many endpoints and pairs are running at once
+GOOGLE_REQUESTS_PER_MINUTE = float(os.getenv("USERAPI_GOOGLE_REQUESTS_PER_MINUTE", "60"))
+# Google's HTML first; SerpAPI (when SERPAPI_KEY is set) is raced against it when it runs slow or is blocked
+SEARCH_BACKENDS = os.getenv("USERAPI_SEARCH_BACKENDS", "google_html,serpapi")
+
+# Role x company batches: how many pairs are searched at once, and how many pairs one batch may hold
+MATRIX_CONCURRENCY = int(os.getenv("USERAPI_MATRIX_CONCURRENCY", "4"))
+MATRIX_MAX_PAIRS = int(os.getenv("USERAPI_MATRIX_MAX_PAIRS", "500"))
+
+# Parsed profiles per (role, company); a cached search answers any request for as many profiles or fewer
+PROFILE_CACHE_PATH = os.getenv(
+    "USERAPI_PROFILE_CACHE_PATH", os.path.join(os.path.dirname(os.path.abspath(__file__)), "profile_cache.sqlite3")
+)
+PROFILE_CACHE_TTL = int(os.getenv("USERAPI_PROFILE_CACHE_TTL", "86400"))
+PROFILE_CACHE_MAX_ENTRIES = int(os.getenv("USERAPI_PROFILE_CACHE_MAX_ENTRIES", "10000"))
+
+profile_cache = DiskCache(PROFILE_CACHE_PATH, ttl=PROFILE_CACHE_TTL, max_entries=PROFILE_CACHE_MAX_ENTRIES)
+
+
 class RoleCompanyRequest(BaseModel):
     role: str
     company_name: str
+    limit: int = Field(10, ge=1, le=GOOGLE_RESULTS_PER_PAGE * GOOGLE_MAX_PAGES)
+    use_cache: bool = True  # False always searches Google, then refreshes the cached copy
+
+
+class RoleCompanyMatrixRequest(BaseModel):
+    roles: List[str]
+    company_names: List[str]
+    limit: int = Field(10, ge=1, le=GOOGLE_RESULTS_PER_PAGE * GOOGLE_MAX_PAGES)  # per pair
+    use_cache: bool = True
 
 
 def clean_text(text):
     return ' '.join(text.split()).strip()
 
 
-def get_google_search_results(query):
-    headers = {
-        "User-Agent": "Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/91.0.4472.124 Safari/537.36",
-        "Accept": "text/html,application/xhtml+xml,application/xml;q=0.9,image/webp,*/*;q=0.8",
-        "Accept-Language": "en-US,en;q=0.5",
-        "Accept-Encoding": "gzip, deflate",
-        "DNT": "1",
-        "Connection": "keep-alive",
-        "Upgrade-Insecure-Requests": "1"
-    }
-    search_url = f"https://www.google.com/search?q={query.replace(' ', '+')}"
+search_gateway = SearchGateway(
+    load_backends(SEARCH_BACKENDS, timeout=GOOGLE_TIMEOUT, google_requests_per_minute=GOOGLE_REQUESTS_PER_MINUTE),
+    max_workers=HTTP_POOL_SIZE,
+)
+page_executor = ThreadPoolExecutor(max_workers=HTTP_POOL_SIZE, thread_name_prefix="google-page")
 
-    try:
-        response = requests.get(search_url, headers=headers)
-        response.raise_for_status()
-        logger.debug(f"Search URL: {search_url}")
-        logger.debug(f"Response status code: {response.status_code}")
-        return response.text
-    except requests.RequestException as e:
-        logger.error(f"Error fetching search results: {e}")
-        raise Exception(f"Failed to fetch search results: {e}")
+
+def search_profiles(query, limit):
+    """Fetch as many result pages as `limit` needs, all at once, and merge them in page order."""
+    page_count = min(GOOGLE_MAX_PAGES, math.ceil(limit / GOOGLE_RESULTS_PER_PAGE))
+    futures = [
+        page_executor.submit(search_gateway.search, query, page * GOOGLE_RESULTS_PER_PAGE, GOOGLE_RESULTS_PER_PAGE)
+        for page in range(page_count)
+    ]
+
+    profiles = []
+    for page, future in enumerate(futures):
+        try:
+            results = future.result().results
+        except Exception as e:
+            if page == 0:
+                raise
+            # Later pages only add to what the first one found
+            logger.warning("Skipping result page %s: %s", page + 1, e)
+            continue
+        profiles.extend(profiles_from_results(results))
+
+    # The same person can show up on several pages
+    return remove_duplicates(profiles)[:limit]
+
+
+def profile_cache_key(role, company_name):
+    return "|".join(" ".join(value.split()).lower() for value in (role, company_name))
+
+
+def find_profiles(role, company_name, limit, use_cache=True):
+    cache_key = profile_cache_key(role, company_name)
+    if use_cache:
+        cached = profile_cache.get(cache_key)
+        if cached is not None and cached["limit"] >= limit:
+            return cached["profiles"][:limit]
+
+    search_query = f'site:linkedin.com/in/ "{role}" "{company_name}"'
+    logger.info("Searching for query: %s", search_query)
+    profiles = search_profiles(search_query, limit)
+    # An empty result is as likely a consent or captcha page as a real zero, so it is not remembered
+    if profiles:
+        profile_cache.set(cache_key, {"limit": limit, "profiles": profiles})
+    return profiles
 
 
 def remove_duplicates(profiles):
@@ -238,74 +316,120 @@ def remove_duplicates(profiles):
         if profile_key not in seen:
             seen.add(profile_key)
             unique_profiles.append(profile)
-            logger.debug(f"Added unique profile: {profile['name']}")
+            logger.debug("Added unique profile: %s", profile['name'], extra=SAMPLED)
         else:
-            logger.debug(f"Skipped duplicate profile: {profile['name']}")
+            logger.debug("Skipped duplicate profile: %s", profile['name'], extra=SAMPLED)
 
     return unique_profiles
 
 
-def parse_profile_results(html_content, limit=15):
-    soup = BeautifulSoup(html_content, 'html.parser')
+def profiles_from_results(results):
+    """LinkedIn profiles among a search backend's organic results."""
     profiles = []
-
-    logger.debug("HTML Content Structure:")
-    logger.debug(soup.prettify()[:1000])  # First 1000 chars for brevity
-
-    # Corrected class names in find_all
-    result_divs = soup.find_all('div', {'class': ['g', 'MjjYud', 'Gx5Zad', 'tF2Cxc', 'LC20lb', 'MBeuO', 'DKV0Md']})
-    logger.debug(f"Found {len(result_divs)} result divs")
-
-    for div in result_divs:
-        try:
-            link_element = div.find('a', href=True)
-            if not link_element or 'linkedin.com/in/' not in link_element['href']:
-                continue
-
-            linkedin_url = link_element['href'].split('?')[0]  # Normalize URL
-
-            title_element = div.find('h3')
-            title = clean_text(title_element.text) if title_element else "No title available"
-
-            summary_element = div.find('span', class_='aCOpRe')
-            summary = clean_text(summary_element.text) if summary_element else "No summary available"
-
-            profile_info = {
-                "name": title,
-                "linkedin_url": linkedin_url,
-                "about_section": summary
-            }
-            logger.debug(f"Found profile: {profile_info}")
-            profiles.append(profile_info)
-
-        except Exception as e:
-            logger.error(f"Error parsing profile div: {e}")
+    for result in results:
+        link = result.get("link") or ""
+        if 'linkedin.com/in/' not in link:
             continue
+        profile_info = {
+            "name": clean_text(result["title"]) if result.get("title") is not None else "No title available",
+            "linkedin_url": link.split('?')[0],  # Normalize URL
+            "about_section": clean_text(result["snippet"]) if result.get("snippet") is not None else "No summary available"
+        }
+        logger.debug("Found profile: %s", profile_info, extra=SAMPLED)
+        profiles.append(profile_info)
+    return profiles
 
-    unique_profiles = remove_duplicates(profiles)
-    return unique_profiles[:limit]
 
+def parse_profile_results(html_content, limit=15, parser=None, parse_only=RESULT_STRAINER):
+    profiles = profiles_from_results(parse_google_results(html_content, parser=parser, parse_only=parse_only))
+    return remove_duplicates(profiles)[:limit]
 
+
+# Plain def: the page fetches block, so FastAPI runs it in its threadpool
 @app.post("/scrape_role_profiles")
-async def scrape_role_profiles(request: RoleCompanyRequest):
+def scrape_role_profiles(request: RoleCompanyRequest):
     try:
-        search_query = f'site:linkedin.com/in/ "{request.role}" "{request.company_name}"'
-        logger.info(f"Searching for query: {search_query}")
-
-        search_results_html = get_google_search_results(search_query)
-        profiles = parse_profile_results(search_results_html, limit=10)
+        profiles = find_profiles(request.role, request.company_name, request.limit, request.use_cache)
 
         if not profiles:
-            logger.warning(f"No profiles found for {request.role} at {request.company_name}")
+            logger.warning("No profiles found for %s at %s", request.role, request.company_name)
             return {"message": f"No profiles found for {request.role} at {request.company_name}"}
 
         return profiles
 
     except Exception as e:
-        logger.error(f"Error in scrape_role_profiles: {e}")
+        logger.error("Error in scrape_role_profiles: %s", e)
         return {"error": str(e)}
 
 
+async def iter_matrix_pairs(pairs, limit, use_cache):
+    """Yield (role, company_name, profiles, error) for every pair, in completion order."""
+    semaphore = asyncio.Semaphore(MATRIX_CONCURRENCY)
+
+    async def search(role, company_name):
+        async with semaphore:
+            try:
+                profiles = await asyncio.to_thread(find_profiles, role, company_name, limit, use_cache)
+                return role, company_name, profiles, None
+            except Exception as e:
+                logger.error("Error searching %s at %s: %s", role, company_name, e)
+                return role, company_name, [], str(e) or type(e).__name__
+
+    tasks = [asyncio.create_task(search(role, company_name)) for role, company_name in pairs]
+    try:
+        for next_done in asyncio.as_completed(tasks):
+            yield await next_done
+    finally:
+        # Pairs not yet searched are dropped when the response stops early
+        for task in tasks:
+            task.cancel()
+
+
+@app.post("/scrape_role_profiles/matrix")
+async def scrape_role_profile_matrix(request: RoleCompanyMatrixRequest, raw_request: Request,
+                                     format: Literal["ndjson", "sse"] = "ndjson"):
+    """Search every role at every company, streaming each pair's profiles as soon as that pair is done.
+
+    A profile is sent once per batch; later pairs that find it again only count it under "duplicates".
+    """
+    roles = list(dict.fromkeys(role.strip() for role in request.roles if role.strip()))
+    company_names = list(dict.fromkeys(name.strip() for name in request.company_names if name.strip()))
+    pairs = [(role, company_name) for company_name in company_names for role in roles]
+    if not pairs or len(pairs) > MATRIX_MAX_PAIRS:
+        raise HTTPException(status_code=400,
+                            detail=f"roles x company_names must give between 1 and {MATRIX_MAX_PAIRS} pairs")
+    logger.info("Starting %s x %s role/company matrix", len(roles), len(company_names))
+
+    async def events():
+        seen_urls = set()
+        counts = {"pairs": 0, "failed": 0, "profiles": 0}
+        results = iter_matrix_pairs(pairs, request.limit, request.use_cache)
+        async with aclosing(results):
+            async for role, company_name, profiles, error in results:
+                if error is not None:
+                    counts["failed"] += 1
+                    yield "error", {"role": role, "company_name": company_name, "detail": error}
+                    continue
+                new_profiles = [profile for profile in profiles if profile["linkedin_url"] not in seen_urls]
+                seen_urls.update(profile["linkedin_url"] for profile in new_profiles)
+                counts["pairs"] += 1
+                counts["profiles"] += len(new_profiles)
+                yield "pair", {
+                    "role": role,
+                    "company_name": company_name,
+                    "profiles": new_profiles,
+                    "duplicates": len(profiles) - len(new_profiles),
+                }
+        yield "done", counts
+
+    return stream_response(events(), format, raw_request, "role/company matrix")
+
+
+@app.get("/stats")
+def get_stats():
+    return {"profile_cache": profile_cache.stats(), "search": search_gateway.stats()}
+
+
 if __name__ == "__main__":
     import uvicorn
 